@@ -50,6 +50,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -58,6 +59,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'usuarios.middleware.QueryInstrumentationMiddleware',
      'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -70,7 +72,7 @@ MIDDLEWARE = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'usuarios.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -85,6 +87,84 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Shared cache behind usuarios.cache: Redis when REDIS_URL is set, otherwise a
+# file-based stand-in so several local worker processes still share entries.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.getenv('FILE_CACHE_DIR', os.path.join(BASE_DIR, '.cache')),
+        }
+    }
+
+# Seconds a cached read-view response lives in the shared cache.
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 300))
+
+# In-process tier in front of it; the TTL bounds how stale another worker's view of a write can be.
+RESPONSE_CACHE_LOCAL_TTL = int(os.getenv('RESPONSE_CACHE_LOCAL_TTL', 5))
+
+RESPONSE_CACHE_LOCAL_SIZE = int(os.getenv('RESPONSE_CACHE_LOCAL_SIZE', 1024))
+
+# How long the previous response is kept to serve requests waiting on a recomputation.
+RESPONSE_CACHE_STALE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_STALE_TIMEOUT', 3600))
+
+# Cross-worker lease held while one request recomputes a missed entry, and how long the others wait for it.
+SINGLE_FLIGHT_LEASE_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_LEASE_TIMEOUT', 30))
+
+SINGLE_FLIGHT_WAIT_TIMEOUT = int(os.getenv('SINGLE_FLIGHT_WAIT_TIMEOUT', 5))
+
+PAGINATION_PAGE_SIZE = int(os.getenv('PAGINATION_PAGE_SIZE', 50))
+
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', 200))
+
+# Seconds an authenticated user is served from the cache instead of the users table.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
+# Build request.user from the name/email/role claims in the token and skip the lookup entirely.
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv('AUTH_TRUST_TOKEN_CLAIMS', 'False') == 'True'
+
+# Validated access tokens kept in memory per process to skip repeated signature checks.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 1024))
+
+# Buffer last_login writes from log_in and flush them in bulk every LAST_LOGIN_FLUSH_INTERVAL seconds.
+LAST_LOGIN_WRITE_BEHIND = os.getenv('LAST_LOGIN_WRITE_BEHIND', 'False') == 'True'
+
+LAST_LOGIN_FLUSH_INTERVAL = int(os.getenv('LAST_LOGIN_FLUSH_INTERVAL', 5))
+
+# Thread pool used by the async log-in/sign-up views for password hashing.
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', min(4, os.cpu_count() or 1)))
+
+PASSWORD_HASHING_MAX_QUEUE = int(os.getenv('PASSWORD_HASHING_MAX_QUEUE', 64))
+
+# Rows fetched per round trip while streaming exports (server-side cursor on PostgreSQL).
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 2000))
+
+# Requests running more ORM queries than this are logged as warnings by QueryInstrumentationMiddleware.
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET', 10))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'usuarios': {
+            'handlers': ['console'],
+            'level': os.getenv('USUARIOS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "https://quizformfe-production.up.railway.app", 
@@ -93,6 +173,13 @@ CORS_ALLOWED_ORIGINS = [
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_EXPOSE_HEADERS = [
+    'X-Next-Cursor',
+    'Link',
+    'Server-Timing',
+    'ETag',
+]
+
 ROOT_URLCONF = 'formgest.urls'
 
 TEMPLATES = [
@@ -0,0 +1,42 @@
+"""
+Settings for running the test suite offline against SQLite.
+
+    python manage.py test --settings=formgest.settings_test
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# The usuarios models are unmanaged; the test runner creates their tables
+# straight from the models instead of replaying the migrations.
+MIGRATION_MODULES = {
+    'usuarios': None,
+}
+
+TEST_RUNNER = 'formgest.test_runner.UnmanagedModelTestRunner'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'loggers': {
+        'usuarios': {
+            'level': 'ERROR',
+        },
+    },
+}
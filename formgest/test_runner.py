@@ -0,0 +1,11 @@
+from django.apps import apps
+from django.test.runner import DiscoverRunner
+
+
+class UnmanagedModelTestRunner(DiscoverRunner):
+    """Lets Django create the tables of the unmanaged usuarios models in the test database."""
+
+    def setup_test_environment(self, *args, **kwargs):
+        for model in apps.get_app_config('usuarios').get_models():
+            model._meta.managed = True
+        super().setup_test_environment(*args, **kwargs)
@@ -0,0 +1,57 @@
+from django.core.cache import cache
+
+from .cache import invalidate_tags, tag_versions
+from .models import Submission
+
+ANSWERED_TIMEOUT = 10 * 60
+
+# Users who answered more forms than this are served by the NOT EXISTS
+# anti-join instead; a huge literal id list would cost more than it saves.
+MAX_CACHED_ANSWERED = 1000
+
+TOO_MANY = 'too-many'
+
+
+def answered_tag(user_id):
+    return f'answered:{user_id}'
+
+
+def _key(user_id, generation):
+    return f'answered-forms:{user_id}:{generation}'
+
+
+def _current_key(user_id):
+    return _key(user_id, tag_versions([answered_tag(user_id)])[0])
+
+
+def cached_answered_form_ids(user_id):
+    """Returns the cached set of form ids ``user_id`` has answered, or ``None`` on a miss."""
+    answered = cache.get(_current_key(user_id))
+    if answered is None or answered == TOO_MANY:
+        return None
+    return answered
+
+
+def answered_form_ids(user_id):
+    return list(
+        Submission.objects.filter(user_id=user_id)
+        .values_list('form_id', flat=True)[:MAX_CACHED_ANSWERED + 1]
+    )
+
+
+def warm_answered_form_ids(user_id):
+    # The key is taken before querying, so a submission that lands while the
+    # query runs moves the generation on and this result is never read.
+    key = _current_key(user_id)
+    if cache.get(key) is not None:
+        return
+    form_ids = answered_form_ids(user_id)
+    if len(form_ids) > MAX_CACHED_ANSWERED:
+        cache.set(key, TOO_MANY, ANSWERED_TIMEOUT)
+    else:
+        cache.set(key, frozenset(form_ids), ANSWERED_TIMEOUT)
+
+
+def invalidate_answered_forms(user_ids):
+    if user_ids:
+        invalidate_tags(*[answered_tag(user_id) for user_id in user_ids])
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import User
+
+# Claims copied into every token so requests can be authenticated without
+# reading the users table when AUTH_TRUST_TOKEN_CLAIMS is enabled.
+USER_CLAIMS = ('name', 'email', 'role')
+
+
+class TokenCache:
+    """Bounded LRU of validated tokens keyed by the raw token.
+
+    Entries are dropped once the token's ``exp`` claim has passed, so a
+    cached token never outlives the signature check it replaces.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, raw_token):
+        with self._lock:
+            entry = self._entries.get(raw_token)
+            if entry is None:
+                return None
+            token, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[raw_token]
+                return None
+            self._entries.move_to_end(raw_token)
+            return token
+
+    def set(self, raw_token, token):
+        expires_at = token.get('exp')
+        if expires_at is None or self.maxsize <= 0:
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[raw_token] = (token, expires_at)
+            self._entries.move_to_end(raw_token)
+            while self._entries:
+                oldest, (_, oldest_expiry) = next(iter(self._entries.items()))
+                if len(self._entries) <= self.maxsize and oldest_expiry > now:
+                    break
+                del self._entries[oldest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache(getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 1024))
+
+
+def _user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def issue_tokens(user):
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    return str(refresh.access_token), str(refresh)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that avoids a users query on every request.
+
+    Users are looked up once and their id, name, email and role are then
+    served from the cache for ``AUTH_USER_CACHE_TIMEOUT`` seconds;
+    ``update_user`` drops the entry when a role changes. With ``AUTH_TRUST_TOKEN_CLAIMS`` the user is rebuilt from
+    the claims embedded by ``issue_tokens`` and the database is not read at
+    all, at the cost of role changes only applying to newly issued tokens.
+
+    Validated tokens are also kept in ``token_cache`` so the signature check
+    and claim parsing run once per token rather than once per request.
+    """
+
+    token_cache = token_cache
+
+    def get_validated_token(self, raw_token):
+        if self.token_cache is None:
+            return super().get_validated_token(raw_token)
+        validated_token = self.token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            self.token_cache.set(raw_token, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if getattr(settings, 'AUTH_TRUST_TOKEN_CLAIMS', False) and all(claim in validated_token for claim in USER_CLAIMS):
+            return self.user_from_claims(user_id, validated_token)
+
+        # Only the public fields are cached; the password hash never leaves
+        # the database.
+        fields = cache.get(_user_key(user_id))
+        if fields is None:
+            user = super().get_user(validated_token)
+            fields = {claim: getattr(user, claim) for claim in USER_CLAIMS}
+            cache.set(_user_key(user_id), fields, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60))
+            return user
+        return self.build_user(user_id, fields)
+
+    def user_from_claims(self, user_id, validated_token):
+        return self.build_user(user_id, {claim: validated_token[claim] for claim in USER_CLAIMS})
+
+    def build_user(self, user_id, fields):
+        user = User(id=user_id, **fields)
+        # Mark the instance as loaded so it can be used in related lookups
+        # and foreign keys like a fetched row.
+        user._state.adding = False
+        user._state.db = 'default'
+        return user
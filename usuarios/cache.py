@@ -0,0 +1,296 @@
+import hashlib
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+FORMS_TAG = 'forms'
+USERS_TAG = 'users'
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+RESPONSE_CACHE_STALE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_STALE_TIMEOUT', 60 * 60)
+SINGLE_FLIGHT_LEASE_TIMEOUT = getattr(settings, 'SINGLE_FLIGHT_LEASE_TIMEOUT', 30)
+SINGLE_FLIGHT_WAIT_TIMEOUT = getattr(settings, 'SINGLE_FLIGHT_WAIT_TIMEOUT', 5)
+POLL_INTERVAL = 0.05
+
+
+def form_tag(form_id):
+    return f'form:{form_id}'
+
+
+def form_tags(request, form_id):
+    return [form_tag(form_id)]
+
+
+def schema_tag(form_id):
+    return f'form-schema:{form_id}'
+
+
+def schema_tags(request, form_id):
+    return [schema_tag(form_id)]
+
+
+class LocalCache:
+    """Bounded in-process LRU whose entries expire ``ttl`` seconds after they are set.
+
+    It sits in front of the shared cache, so the TTL also bounds how long a
+    process can miss an invalidation made by another process.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+local_cache = LocalCache(
+    maxsize=getattr(settings, 'RESPONSE_CACHE_LOCAL_SIZE', 1024),
+    ttl=getattr(settings, 'RESPONSE_CACHE_LOCAL_TTL', 5),
+)
+
+
+def _tag_key(tag):
+    return f'cache-tag:{tag}'
+
+
+def tag_versions(tags):
+    """Returns the current version of each tag, creating the missing ones."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = {}
+    missing = []
+    for key in keys:
+        version = local_cache.get(key)
+        if version is None:
+            missing.append(key)
+        else:
+            versions[key] = version
+
+    if missing:
+        found = cache.get_many(missing)
+        new = {key: uuid.uuid4().hex for key in missing if key not in found}
+        if new:
+            cache.set_many(new, None)
+        for key, version in {**found, **new}.items():
+            local_cache.set(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Makes every entry cached under any of ``tags`` unreachable.
+
+    Versions are random rather than incremented, so a version that was
+    evicted and recreated never matches an old entry.
+    """
+    keys = [_tag_key(tag) for tag in tags]
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+    local_cache.delete_many(keys)
+
+
+def invalidate_form(form_id, schema=False):
+    """Called after any write to a form or its questions, answers, comments or likes.
+
+    Pass ``schema`` when the form's title, description, status or questions
+    changed, so its compiled schema and ``get_question`` are rebuilt too;
+    answers, comments and likes leave them alone.
+    """
+    tags = [form_tag(form_id), FORMS_TAG]
+    if schema:
+        tags.append(schema_tag(form_id))
+    invalidate_tags(*tags)
+
+
+def _lookup(key):
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def _store(key, value, timeout, stale_key=None):
+    cache.set(key, value, timeout)
+    local_cache.set(key, value)
+    if stale_key is not None:
+        cache.set(stale_key, value, RESPONSE_CACHE_STALE_TIMEOUT)
+
+
+class _Flight:
+    def __init__(self):
+        self.lock = threading.Lock()
+
+
+_flights = weakref.WeakValueDictionary()
+_flights_lock = threading.Lock()
+
+
+def _flight(key):
+    with _flights_lock:
+        flight = _flights.get(key)
+        if flight is None:
+            flight = _flights[key] = _Flight()
+        return flight
+
+
+def single_flight(key, compute, timeout, stale_key=None):
+    """Returns the cached value of ``key``, making sure only one caller computes it on a miss.
+
+    Within a process, concurrent callers of the same key queue on a lock;
+    across workers, the caller that wins a ``cache.add`` lease computes and
+    the rest poll the cache for its result. While waiting, callers return
+    the last value stored under ``stale_key`` if there is one. ``compute``
+    may return ``None`` for results that must not be cached; a caller gets
+    ``None`` back only if it ran ``compute`` itself.
+    """
+    value = _lookup(key)
+    if value is not None:
+        return value
+
+    flight = _flight(key)
+    if not flight.lock.acquire(blocking=False):
+        stale = cache.get(stale_key) if stale_key else None
+        if stale is not None:
+            return stale
+        flight.lock.acquire()
+    try:
+        value = _lookup(key)
+        if value is not None:
+            return value
+
+        lease = f'lease:{key}'
+        if not cache.add(lease, 1, SINGLE_FLIGHT_LEASE_TIMEOUT):
+            stale = cache.get(stale_key) if stale_key else None
+            if stale is not None:
+                return stale
+            deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                value = _lookup(key)
+                if value is not None:
+                    return value
+                if cache.get(lease) is None:
+                    break
+            # The holder gave up, produced something uncacheable or is too slow.
+            value = compute()
+            if value is not None:
+                _store(key, value, timeout, stale_key)
+            return value
+
+        try:
+            value = compute()
+            if value is not None:
+                _store(key, value, timeout, stale_key)
+            return value
+        finally:
+            cache.delete(lease)
+    finally:
+        flight.lock.release()
+
+
+def cached_value(name, tags, compute, timeout=None):
+    """Returns ``compute()`` through both tiers, keyed by ``name`` and the versions of ``tags``.
+
+    ``None`` results are not cached.
+    """
+    key = _hashed('value', f"{name}|{'.'.join(tag_versions(tags))}")
+    value = _lookup(key)
+    if value is None:
+        value = compute()
+        if value is not None:
+            _store(key, value, RESPONSE_CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+def _view_key(view, request, per_user):
+    user = request.user.pk if per_user else '*'
+    return f'{view.__module__}.{view.__qualname__}|{user}|{request.get_full_path()}'
+
+
+def _hashed(prefix, raw):
+    return f'{prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def cached_response(tags, per_user=False, timeout=None, coalesce=False):
+    """Caches successful GET responses of a view in both tiers.
+
+    ``tags`` is a list of tags or a callable taking the view's arguments and
+    returning one. With ``per_user`` each user gets their own entry; use it
+    for views whose output depends on ``request.user``. With ``coalesce``
+    misses go through ``single_flight`` and waiting requests may be served
+    the response from before the last invalidation.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+
+            view_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+            raw = _view_key(view, request, per_user)
+            key = _hashed('response', f"{raw}|{'.'.join(tag_versions(view_tags))}")
+            entry_timeout = RESPONSE_CACHE_TIMEOUT if timeout is None else timeout
+            response = None
+
+            def compute():
+                nonlocal response
+                response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.streaming:
+                    return (response.status_code, response.content, list(response.items()))
+                return None
+
+            if coalesce:
+                entry = single_flight(key, compute, entry_timeout, stale_key=_hashed('stale', raw))
+            else:
+                entry = _lookup(key)
+                if entry is None:
+                    entry = compute()
+                    if entry is not None:
+                        _store(key, entry, entry_timeout)
+
+            if response is not None:
+                return response
+            status, content, headers = entry
+            response = HttpResponse(content, status=status)
+            for name, value in headers:
+                response[name] = value
+            return response
+        return wrapper
+    return decorator
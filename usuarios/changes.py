@@ -0,0 +1,80 @@
+from django.db.models import F
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Form, Question, Tombstone
+from .pagination import InvalidCursor, after, decode_cursor, encode_cursor, position_of
+
+# Each synced table is read on its own (time, id) keyset, so a busy table
+# cannot hold back the others. The cursor stores one position per entry.
+# Forms are keyed on synced_at, which counter updates move as well.
+SYNCED = {
+    'forms': ('synced_at', lambda: Form.objects.values(
+        'id', 'user_id', 'title', 'description', 'status', 'likes_count', 'comments_count',
+        'responses_count', 'created_at', 'updated_at', 'synced_at',
+    )),
+    'questions': ('updated_at', lambda: Question.objects.values(
+        'id', 'form_id', 'type', 'question', 'options', 'required', 'created_at', 'updated_at',
+    )),
+    'comments': ('updated_at', lambda: Comment.objects.values(
+        'id', 'form_id', 'user_id', 'comment', 'created_at', 'updated_at', name=F('user__name'),
+    )),
+}
+
+
+def start_positions(since):
+    """Positions that return everything changed after the ``since`` ISO timestamp."""
+    try:
+        timestamp = parse_datetime(since)
+    except ValueError:
+        timestamp = None
+    if timestamp is None:
+        raise InvalidCursor(since)
+    position = [timestamp.isoformat(), 0]
+    return {table: position for table in [*SYNCED, 'deleted']}
+
+
+def decode_positions(cursor):
+    positions = decode_cursor(cursor)
+    if not isinstance(positions, dict):
+        raise InvalidCursor(cursor)
+    return positions
+
+
+def collect_changes(positions, size):
+    """Returns up to ``size`` changes per table after ``positions``, and the next cursor.
+
+    Rows come back whole whether they were created or updated; clients
+    upsert them by id. Deleted forms and comments are listed from their
+    tombstones; a deleted form also takes its questions and comments with it.
+    """
+    changes = {}
+    has_more = False
+    next_positions = dict(positions)
+
+    for table, (time_field, queryset) in SYNCED.items():
+        rows = queryset()
+        if table in positions:
+            rows = after(rows, positions[table], time_field)
+        rows = list(rows.order_by(time_field, 'id')[:size + 1])
+        has_more = has_more or len(rows) > size
+        rows = rows[:size]
+        if rows:
+            next_positions[table] = position_of(rows[-1], time_field)
+        changes[table] = rows
+
+    tombstones = Tombstone.objects.values('id', 'table', 'object_id', 'form_id', 'deleted_at')
+    if 'deleted' in positions:
+        tombstones = after(tombstones, positions['deleted'], 'deleted_at')
+    tombstones = list(tombstones.order_by('deleted_at', 'id')[:size + 1])
+    has_more = has_more or len(tombstones) > size
+    tombstones = tombstones[:size]
+    if tombstones:
+        next_positions['deleted'] = position_of(tombstones[-1], 'deleted_at')
+
+    changes['deleted'] = {
+        'forms': [row['object_id'] for row in tombstones if row['table'] == 'forms'],
+        'comments': [row['object_id'] for row in tombstones if row['table'] == 'comments'],
+    }
+    changes['cursor'] = encode_cursor(next_positions)
+    changes['has_more'] = has_more
+    return changes
@@ -0,0 +1,88 @@
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import cached_value
+from .models import Comment, Form
+
+
+def _version(newest, count):
+    stamp = int(newest.timestamp() * 1_000_000) if newest else 0
+    return f'{stamp}-{count}'
+
+
+def question_validators(request, form_id):
+    row = (
+        Form.objects.filter(id=form_id)
+        .annotate(newest=Max('question__updated_at'), count=Count('question'))
+        .values_list('updated_at', 'newest', 'count')
+        .first()
+    )
+    if row is None:
+        return None
+    updated_at, newest, count = row
+    newest = max(updated_at, newest) if newest else updated_at
+    return _version(newest, count), newest
+
+
+def forms_validators(request, user_id=None):
+    forms = Form.objects.all() if user_id is None else Form.objects.filter(user_id=user_id)
+    found = forms.aggregate(newest=Max('updated_at'), count=Count('id'))
+    return _version(found['newest'], found['count']), found['newest']
+
+
+def comments_validators(request, form_id):
+    found = Comment.objects.filter(form_id=form_id).aggregate(newest=Max('updated_at'), count=Count('id'))
+    return _version(found['newest'], found['count']), found['newest']
+
+
+def likes_validators(request, form_id):
+    likes_count = Form.objects.filter(id=form_id).values_list('likes_count', flat=True).first()
+    if likes_count is None:
+        return None
+    return str(likes_count), None
+
+
+def conditional(validators, tags):
+    """Answers conditional GETs from a cheap aggregate instead of running the view.
+
+    ``validators`` returns ``(version, last_modified)`` for the view's
+    arguments, or ``None`` to skip validation. The result is cached under
+    ``tags`` (a list or a callable, as in ``cached_response``), so it is only
+    recomputed after a write. The ETag also covers the query string, since
+    pages of the same list share one version.
+
+    Last-Modified is sent but ``If-Modified-Since`` is not honoured: deleting
+    a row lowers the count without moving ``max(updated_at)``, so only the
+    ETag reliably changes.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            view_tags = tags(request, *args, **kwargs) if callable(tags) else tags
+            name = f'validators|{view.__module__}.{view.__qualname__}|{args}|{sorted(kwargs.items())}'
+            found = cached_value(name, view_tags, lambda: validators(request, *args, **kwargs))
+            if found is None:
+                return view(request, *args, **kwargs)
+
+            version, last_modified = found
+            etag = quote_etag(hashlib.md5(f'{request.get_full_path()}|{version}'.encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+            response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,123 @@
+import csv
+import json
+from itertools import groupby, islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from .models import Answer, Question
+
+EXPORT_CHUNK_SIZE = getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+# Lines sent per thread hop when streaming under ASGI.
+EXPORT_LINES_PER_CHUNK = getattr(settings, 'EXPORT_LINES_PER_CHUNK', 100)
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """File-like object whose ``write`` returns the line, so ``csv.writer`` can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _respondent(answer):
+    # Anonymous answers have no user; the answers of one anonymous
+    # submission share the created_at that create_answers stamps on them.
+    if answer['user_id'] is None:
+        return None, answer['created_at']
+    return answer['user_id'], None
+
+
+def respondent_rows(form_id):
+    """Yields ``(questions, respondents)`` with one dict per respondent, streamed from the database.
+
+    Answers are read with ``.iterator()`` (a server-side cursor on
+    PostgreSQL) ordered by respondent, so only one respondent's answers are
+    held at a time. When a question was answered more than once the latest
+    answer wins.
+    """
+    questions = list(Question.objects.filter(form_id=form_id).order_by('id').values('id', 'question'))
+    answers = (
+        Answer.objects.filter(form_id=form_id)
+        .order_by('user_id', 'created_at', 'id')
+        .values('user_id', 'question_id', 'answer', 'created_at', name=F('user__name'))
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+
+    def rows():
+        for _, group in groupby(answers, key=_respondent):
+            row = None
+            for answer in group:
+                if row is None:
+                    row = {
+                        'respondent_id': answer['user_id'],
+                        'respondent_name': answer['name'],
+                        'submitted_at': answer['created_at'],
+                        'answers': {},
+                    }
+                row['answers'][answer['question_id']] = answer['answer']
+            yield row
+
+    return questions, rows()
+
+
+def stream_csv(form_id):
+    questions, rows = respondent_rows(form_id)
+    writer = csv.writer(Echo())
+    header = ['respondent_id', 'respondent_name', 'submitted_at'] + [question['question'] for question in questions]
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(
+            [row['respondent_id'], row['respondent_name'], row['submitted_at'].isoformat()] +
+            [row['answers'].get(question['id'], '') for question in questions]
+        )
+
+
+def stream_ndjson(form_id):
+    questions, rows = respondent_rows(form_id)
+    question_ids = {question['id'] for question in questions}
+    for row in rows:
+        row['answers'] = {
+            str(question_id): answer
+            for question_id, answer in row['answers'].items()
+            if question_id in question_ids
+        }
+        yield json.dumps(row, cls=DjangoJSONEncoder) + '\n'
+
+
+STREAMS = {
+    'csv': stream_csv,
+    'ndjson': stream_ndjson,
+}
+
+
+def _take(lines, count):
+    return ''.join(islice(lines, count))
+
+
+async def _stream_async(lines):
+    while True:
+        chunk = await sync_to_async(_take)(lines, EXPORT_LINES_PER_CHUNK)
+        if not chunk:
+            return
+        yield chunk
+
+
+def export_stream(request, export_format, form_id):
+    """Returns the export as an iterator suited to the server serving ``request``.
+
+    Under ASGI Django would read a sync iterator into a list before sending
+    the first byte, so the lines are pulled a chunk at a time through
+    ``sync_to_async`` instead.
+    """
+    lines = STREAMS[export_format](form_id)
+    if isinstance(request, ASGIRequest):
+        return _stream_async(lines)
+    return lines
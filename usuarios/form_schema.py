@@ -0,0 +1,82 @@
+import json
+import threading
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .cache import schema_tag, tag_versions
+from .models import Form, Question
+
+SCHEMA_TIMEOUT = 60 * 60
+LOCAL_SCHEMAS = 256
+
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def _schema_key(form_id, generation):
+    return f'form-schema:{form_id}:{generation}'
+
+
+def compile_form_schema(form):
+    """Builds the serialized schema of ``form``."""
+    questions = list(
+        Question.objects.filter(form_id=form.id)
+        .order_by('id')
+        .values('id', 'question', 'type', 'options', 'required', 'created_at', 'updated_at')
+    )
+    newest = max([form.updated_at] + [question['updated_at'] for question in questions])
+
+    schema = {
+        'id': form.id,
+        'title': form.title,
+        'description': form.description,
+        'status': form.status,
+        'updated_at': newest,
+        'questions': questions,
+    }
+    return json.dumps(schema, cls=DjangoJSONEncoder)
+
+
+def _remember(form_id, generation, blob):
+    with _local_lock:
+        _local[(form_id, generation)] = blob
+        _local.move_to_end((form_id, generation))
+        while len(_local) > LOCAL_SCHEMAS:
+            _local.popitem(last=False)
+
+
+def _recall(form_id, generation):
+    with _local_lock:
+        blob = _local.get((form_id, generation))
+        if blob is not None:
+            _local.move_to_end((form_id, generation))
+        return blob
+
+
+def get_form_schema(form_id):
+    """Returns a fresh copy of the compiled schema of a form, or ``None`` if it does not exist.
+
+    Schemas are stored under the generation of the form's schema tag, read
+    before the database is queried. A write bumps the generation after it
+    commits, so a schema built from data read before the write lands under
+    the old generation and is never served again.
+    """
+    generation = tag_versions([schema_tag(form_id)])[0]
+    blob = _recall(form_id, generation)
+    if blob is None:
+        blob = cache.get(_schema_key(form_id, generation))
+        if blob is not None:
+            _remember(form_id, generation, blob)
+    if blob is not None:
+        return json.loads(blob)
+
+    form = Form.objects.filter(id=form_id).first()
+    if form is None:
+        return None
+
+    blob = compile_form_schema(form)
+    cache.set(_schema_key(form_id, generation), blob, SCHEMA_TIMEOUT)
+    _remember(form_id, generation, blob)
+    return json.loads(blob)
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUEUE_SECONDS = 0.1
+
+# QueryInstrumentationMiddleware sets this to a list that collects the queue
+# waits of the request being served, for its performance log line.
+request_queue_times = ContextVar('request_queue_times', default=None)
+
+
+class HashingPoolFull(Exception):
+    pass
+
+
+class PasswordHashingPool:
+    """Runs the deliberately slow password hashers on a bounded thread pool.
+
+    At most ``workers`` hashes run at once and at most ``max_queue`` more may
+    wait; anything beyond that is rejected with ``HashingPoolFull`` so a
+    login burst cannot pile up work. Queue and run times are tracked for
+    ``stats()``, which the performance log line of each request that hashed
+    a password includes.
+    """
+
+    def __init__(self, workers, max_queue):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_time = 0.0
+        self._queue_time_max = 0.0
+        self._run_time = 0.0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hashing')
+            return self._executor
+
+    async def run(self, func, *args):
+        with self._lock:
+            if self._in_flight >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolFull()
+            self._in_flight += 1
+
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started - submitted, time.perf_counter() - started
+
+        try:
+            loop = asyncio.get_running_loop()
+            result, queued, ran = await loop.run_in_executor(self._get_executor(), job)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        with self._lock:
+            self._completed += 1
+            self._queue_time += queued
+            self._queue_time_max = max(self._queue_time_max, queued)
+            self._run_time += ran
+        queue_times = request_queue_times.get()
+        if queue_times is not None:
+            queue_times.append(queued)
+        if queued > SLOW_QUEUE_SECONDS:
+            logger.warning('Password hashing waited %.1f ms in the queue', queued * 1000)
+        return result
+
+    async def check_password(self, password, encoded):
+        return await self.run(hashers.check_password, password, encoded)
+
+    async def make_password(self, password):
+        return await self.run(hashers.make_password, password)
+
+    def stats(self):
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'queue_ms_avg': self._queue_time / completed * 1000,
+                'queue_ms_max': self._queue_time_max * 1000,
+                'run_ms_avg': self._run_time / completed * 1000,
+            }
+
+
+hashing_pool = PasswordHashingPool(
+    workers=getattr(settings, 'PASSWORD_HASHING_WORKERS', min(4, os.cpu_count() or 1)),
+    max_queue=getattr(settings, 'PASSWORD_HASHING_MAX_QUEUE', 64),
+)
@@ -0,0 +1,87 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .cache import USERS_TAG, invalidate_tags
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+def write_last_logins(pending):
+    """Writes ``{user_id: last_login}`` to the users table in a single statement."""
+    if connection.vendor == 'postgresql':
+        table = connection.ops.quote_name(User._meta.db_table)
+        values = ', '.join(['(%s::integer, %s::timestamptz)'] * len(pending))
+        params = [value for item in pending.items() for value in item]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET last_login = v.last_login '
+                f'FROM (VALUES {values}) AS v(id, last_login) '
+                f'WHERE {table}.id = v.id '
+                f'AND ({table}.last_login IS NULL OR {table}.last_login < v.last_login)',
+                params,
+            )
+    else:
+        User.objects.bulk_update(
+            [User(id=user_id, last_login=last_login) for user_id, last_login in pending.items()],
+            ['last_login'],
+        )
+    # get_users lists last_login.
+    invalidate_tags(USERS_TAG)
+
+
+class LastLoginBuffer:
+    """Coalesces ``last_login`` updates and flushes them every ``interval`` seconds.
+
+    A login storm then costs one UPDATE per interval instead of one write,
+    and one row lock, per login.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def record(self, user_id, last_login):
+        with self._lock:
+            current = self._pending.get(user_id)
+            if current is None or current < last_login:
+                self._pending[user_id] = last_login
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self._flush_in_background)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if pending:
+            write_last_logins(pending)
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Could not flush last_login updates')
+        finally:
+            connection.close()
+
+
+buffer = LastLoginBuffer(getattr(settings, 'LAST_LOGIN_FLUSH_INTERVAL', 5))
+atexit.register(buffer.flush)
+
+
+def record_last_login(user):
+    user.last_login = timezone.now()
+    if getattr(settings, 'LAST_LOGIN_WRITE_BEHIND', False):
+        buffer.record(user.id, user.last_login)
+    else:
+        user.save(update_fields=['last_login'])
+        invalidate_tags(USERS_TAG)
@@ -0,0 +1,46 @@
+from .models import User
+
+
+class UserNameLoader:
+    """Batches user name lookups for the lifetime of a single request.
+
+    Ids are queued with ``load``/``load_many`` and resolved together with one
+    ``IN`` query the first time a name is read. Resolved names are kept in an
+    identity map, so repeated ids never hit the database again.
+    """
+
+    def __init__(self):
+        self._names = {}
+        self._pending = set()
+
+    def load(self, user_id):
+        if user_id is not None and user_id not in self._names:
+            self._pending.add(user_id)
+
+    def load_many(self, user_ids):
+        for user_id in user_ids:
+            self.load(user_id)
+
+    def dispatch(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, set()
+        found = dict(User.objects.filter(id__in=pending).values_list('id', 'name'))
+        for user_id in pending:
+            self._names[user_id] = found.get(user_id)
+
+    def get(self, user_id):
+        if user_id is None:
+            return None
+        if user_id not in self._names:
+            self.load(user_id)
+            self.dispatch()
+        return self._names[user_id]
+
+
+def user_names(request):
+    loader = getattr(request, '_user_names', None)
+    if loader is None:
+        loader = UserNameLoader()
+        request._user_names = loader
+    return loader
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Min
+
+from usuarios.models import Answer, Submission
+from usuarios.provisioning import ensure_tables
+
+
+class Command(BaseCommand):
+    help = 'Fills the submissions table with one row per (form, user) found in answers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        ensure_tables([Submission])
+        batch_size = options['batch_size']
+
+        pairs = (
+            Answer.objects.filter(user_id__isnull=False)
+            .values('form_id', 'user_id')
+            .annotate(first_answer=Min('created_at'))
+            .order_by()
+        )
+
+        batch = []
+        total = 0
+        for pair in pairs.iterator(chunk_size=batch_size):
+            batch.append(Submission(
+                form_id=pair['form_id'],
+                user_id=pair['user_id'],
+                created_at=pair['first_answer'],
+            ))
+            if len(batch) >= batch_size:
+                Submission.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        if batch:
+            Submission.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+
+        self.stdout.write(f'Processed {total} submissions')
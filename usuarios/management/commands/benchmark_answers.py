@@ -0,0 +1,68 @@
+import json
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from usuarios.models import Form, Question, User
+from usuarios import views
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures create_answers latency per submission for forms of increasing size. '
+        'Everything runs inside a transaction that is rolled back at the end, and cache '
+        'invalidation is skipped since the rollback could not undo it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--questions', default='1,10,50,100', help='Comma separated question counts.')
+        parser.add_argument('--repeat', type=int, default=20, help='Submissions timed per question count.')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['questions'].split(',')]
+        factory = RequestFactory()
+
+        self.stdout.write(f"{'questions':>9} {'p50 ms':>9} {'p95 ms':>9} {'ms/answer':>10} {'queries':>8}")
+        # The cache may be shared with production, and invalidating the forms
+        # tag there would drop every cached list response.
+        try:
+            with mock.patch.object(views, 'invalidate_form'), \
+                    mock.patch.object(views, 'invalidate_answered_forms'), \
+                    transaction.atomic():
+                user = User.objects.create(name='benchmark', email='benchmark@quizform.invalid', password='!')
+                for size in sizes:
+                    form = Form.objects.create(user=user, title=f'benchmark {size}')
+                    questions = Question.objects.bulk_create([
+                        Question(form=form, type='text', question=f'Question {number}')
+                        for number in range(size)
+                    ])
+                    body = json.dumps([
+                        {'question_id': question.id, 'user_id': user.id, 'answer': 'benchmark'}
+                        for question in questions
+                    ])
+
+                    timings = []
+                    queries = 0
+                    for _ in range(options['repeat']):
+                        request = factory.post('/', data=body, content_type='application/json')
+                        with CaptureQueriesContext(connection) as captured:
+                            start = time.perf_counter()
+                            views.create_answers(request, form.id)
+                            timings.append((time.perf_counter() - start) * 1000)
+                        queries = len(captured.captured_queries)
+
+                    p50 = statistics.median(timings)
+                    p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+                    self.stdout.write(f'{size:>9} {p50:>9.2f} {p95:>9.2f} {p50 / size:>10.3f} {queries:>8}')
+                raise Rollback
+        except Rollback:
+            pass
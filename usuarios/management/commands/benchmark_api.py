@@ -0,0 +1,269 @@
+import json
+import logging
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from usuarios.answered import answered_tag
+from usuarios.authentication import issue_tokens
+from usuarios.cache import FORMS_TAG, USERS_TAG, form_tag, invalidate_tags, local_cache
+from usuarios.models import Form, User
+
+# (name, method, path) relative to --prefix. Placeholders are filled from the
+# seeded database; log-in is only run when --password is given.
+ENDPOINTS = [
+    ('get-users', 'GET', 'get-users/'),
+    ('forms-info', 'GET', 'forms-info/'),
+    ('user-forms', 'GET', 'forms-info/{user_id}/'),
+    ('feed', 'GET', 'feed/'),
+    ('get-question', 'GET', 'get-question/{form_id}/'),
+    ('get-answer', 'GET', 'get-answer/{form_id}/'),
+    ('get-answers', 'GET', 'get-answers/'),
+    ('changes-since', 'GET', 'changes-since/'),
+    ('export-csv', 'GET', 'export/{form_id}/csv/'),
+    ('search-forms', 'GET', 'search-forms/?query={query}'),
+    ('unanswered-forms', 'GET', 'unanswered-forms/{user_id}/'),
+    ('comments', 'GET', 'comments/{form_id}/'),
+    ('likes', 'GET', 'likes/{form_id}/'),
+    ('log-in', 'POST', 'log-in/'),
+]
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def percentile(timings, percent):
+    if len(timings) == 1:
+        return timings[0]
+    return statistics.quantiles(timings, n=100, method='inclusive')[percent - 1]
+
+
+class TestClientSender:
+    """Sends requests in-process through the full middleware stack."""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.local = threading.local()
+
+    def send(self, method, path, body):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client(raise_request_exception=False, HTTP_HOST='localhost', **{
+                f"HTTP_{name.upper().replace('-', '_')}": value for name, value in self.headers.items()
+            })
+        if method == 'POST':
+            response = client.post(path, data=body, content_type='application/json')
+        else:
+            response = client.get(path)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, response.get('Server-Timing', '')
+
+    def close(self):
+        connections.close_all()
+
+
+class HTTPSender:
+    """Sends requests to a running server."""
+
+    def __init__(self, url, headers):
+        self.url = url.rstrip('/')
+        self.headers = headers
+
+    def send(self, method, path, body):
+        request = urllib.request.Request(
+            self.url + path,
+            data=body.encode() if body else None,
+            method=method,
+            headers={**self.headers, 'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                return response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code, error.headers.get('Server-Timing', '')
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the usuarios endpoints with concurrent clients and reports p50/p95/p99 '
+        'latency, throughput and queries per request. Run it against a seeded database '
+        '(see seed_quizform); results can be written as JSON and compared with a baseline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server. Defaults to the in-process test client.')
+        parser.add_argument('--prefix', default='/forms/')
+        parser.add_argument('--endpoints', help='Comma separated endpoint names. Defaults to all of them.')
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=10, help='Untimed requests per endpoint.')
+        parser.add_argument('--cold', action='store_true',
+                            help='Invalidate the cached responses before every request, so each one is a miss. '
+                                 'With --url, set RESPONSE_CACHE_LOCAL_TTL=0 on the server as well.')
+        parser.add_argument('--user-id', type=int, help='Defaults to the owner of the most answered form.')
+        parser.add_argument('--form-id', type=int, help='Defaults to the most answered form.')
+        parser.add_argument('--query', default='encuesta', help='search-forms query.')
+        parser.add_argument('--password', help="The user's password; enables the log-in endpoint.")
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--baseline', help='Compare with a JSON file written by --output.')
+        parser.add_argument('--tolerance', type=float, default=0.10,
+                            help='Allowed p95 slowdown against the baseline, as a fraction.')
+
+    def handle(self, *args, **options):
+        if options['form_id']:
+            form = Form.objects.select_related('user').filter(id=options['form_id']).first()
+        else:
+            form = Form.objects.select_related('user').order_by('-responses_count', 'id').first()
+        if form is None:
+            raise CommandError('No forms to benchmark; run seed_quizform first')
+        user = User.objects.get(id=options['user_id']) if options['user_id'] else form.user
+
+        access_token, _ = issue_tokens(user)
+        headers = {'Authorization': f'Bearer {access_token}'}
+        if options['url']:
+            sender = HTTPSender(options['url'], headers)
+        else:
+            sender = TestClientSender(headers)
+            # The per-request log lines would drown the report.
+            logging.getLogger('usuarios.performance').setLevel(logging.WARNING)
+
+        selected = set(options['endpoints'].split(',')) if options['endpoints'] else None
+        login_body = json.dumps({'email': user.email, 'password': options['password']})
+        placeholders = {'user_id': user.id, 'form_id': form.id, 'query': quote(options['query'])}
+
+        before_request = None
+        if options['cold']:
+            # Only the tags these endpoints are cached under; the cache may be
+            # shared, so it is never cleared wholesale.
+            def before_request():
+                invalidate_tags(FORMS_TAG, USERS_TAG, form_tag(form.id), answered_tag(user.id))
+                local_cache.clear()
+
+        results = {}
+        self.stdout.write(
+            f"{'endpoint':<18} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'queries':>8} {'errors':>7}"
+        )
+        for name, method, path in ENDPOINTS:
+            if selected is not None and name not in selected:
+                continue
+            if name == 'log-in' and not options['password']:
+                continue
+            path = options['prefix'] + path.format(**placeholders)
+            body = login_body if method == 'POST' else None
+            result = self.run_endpoint(sender, method, path, body, options, before_request)
+            results[name] = result
+            self.stdout.write(
+                f"{name:<18} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['throughput']:>8.1f} {result['queries']!s:>8} {result['errors']:>7}"
+            )
+
+        report = {
+            'target': options['url'] or 'test-client',
+            'requests': options['requests'],
+            'concurrency': options['concurrency'],
+            'cold': options['cold'],
+            'form_id': form.id,
+            'user_id': user.id,
+            'endpoints': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        if options['baseline']:
+            self.compare(report, options['baseline'], options['tolerance'])
+
+    def run_endpoint(self, sender, method, path, body, options, before_request=None):
+        for _ in range(options['warmup']):
+            sender.send(method, path, body)
+
+        concurrency = max(1, options['concurrency'])
+        timings = []
+        queries = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker(count):
+            local_timings, local_queries, local_errors = [], [], 0
+            try:
+                for _ in range(count):
+                    if before_request is not None:
+                        before_request()
+                    start = time.perf_counter()
+                    status, server_timing = sender.send(method, path, body)
+                    local_timings.append((time.perf_counter() - start) * 1000)
+                    match = SERVER_TIMING_QUERIES.search(server_timing)
+                    if match:
+                        local_queries.append(int(match.group(1)))
+                    if status >= 400:
+                        local_errors += 1
+            finally:
+                if threading.current_thread() is not threading.main_thread():
+                    sender.close()
+            with lock:
+                timings.extend(local_timings)
+                queries.extend(local_queries)
+                errors.append(local_errors)
+
+        shares = [options['requests'] // concurrency + (index < options['requests'] % concurrency)
+                  for index in range(concurrency)]
+        start = time.perf_counter()
+        if concurrency == 1:
+            worker(shares[0])
+        else:
+            threads = [threading.Thread(target=worker, args=(share,)) for share in shares]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        elapsed = time.perf_counter() - start
+
+        if not timings:
+            return {'p50_ms': 0.0, 'p95_ms': 0.0, 'p99_ms': 0.0, 'throughput': 0.0, 'queries': None, 'errors': 0}
+        return {
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'throughput': round(len(timings) / elapsed, 1),
+            'queries': max(queries) if queries else None,
+            'errors': sum(errors),
+        }
+
+    def compare(self, report, baseline_path, tolerance):
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)['endpoints']
+
+        regressions = []
+        self.stdout.write(f"{'endpoint':<18} {'p95 base':>9} {'p95 now':>9} {'change':>8} {'queries':>9}")
+        for name, result in report['endpoints'].items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] if before['p95_ms'] else 0.0
+            self.stdout.write(
+                f"{name:<18} {before['p95_ms']:>9.2f} {result['p95_ms']:>9.2f} {change:>+8.1%} "
+                f"{before['queries']!s:>4}->{result['queries']!s:<4}"
+            )
+            if change > tolerance:
+                regressions.append(f'{name}: p95 {change:+.1%}')
+            if before['queries'] is not None and (result['queries'] or 0) > before['queries']:
+                regressions.append(f"{name}: {before['queries']} -> {result['queries']} queries")
+            if result['errors'] > before['errors']:
+                regressions.append(f"{name}: {before['errors']} -> {result['errors']} errors")
+
+        if regressions:
+            raise CommandError('Performance regressions against the baseline:\n' + '\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
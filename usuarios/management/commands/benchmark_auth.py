@@ -0,0 +1,68 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from usuarios.authentication import CachedJWTAuthentication, TokenCache, invalidate_cached_user, issue_tokens
+from usuarios.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class UncachedTokenAuthentication(CachedJWTAuthentication):
+    token_cache = None
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the per-request cost of JWT authentication with and without the '
+        'decoded-token and user caches. Runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        variants = [
+            ('simplejwt JWTAuthentication', JWTAuthentication),
+            ('user cache only', UncachedTokenAuthentication),
+            ('user cache + token LRU', type('TokenCachedAuthentication', (CachedJWTAuthentication,), {
+                'token_cache': TokenCache(1024),
+            })),
+        ]
+
+        user = None
+        try:
+            with transaction.atomic():
+                user = User.objects.create(name='benchmark', email='benchmark@quizform.invalid', password='!')
+                access_token, _ = issue_tokens(user)
+                request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access_token}')
+
+                self.stdout.write(f"{'variant':<30} {'us/request':>11} {'queries':>8}")
+                for label, authentication_class in variants:
+                    # Only the benchmark user's entry; the cache may be shared with production.
+                    invalidate_cached_user(user.id)
+                    authentication = authentication_class()
+                    authentication.authenticate(request)
+
+                    with CaptureQueriesContext(connection) as captured:
+                        start = time.perf_counter()
+                        for _ in range(iterations):
+                            authentication.authenticate(request)
+                        elapsed = time.perf_counter() - start
+
+                    per_request = elapsed / iterations * 1_000_000
+                    queries = len(captured.captured_queries) / iterations
+                    self.stdout.write(f'{label:<30} {per_request:>11.1f} {queries:>8.2f}')
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            if user is not None:
+                invalidate_cached_user(user.id)
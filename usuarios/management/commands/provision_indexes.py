@@ -0,0 +1,161 @@
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+# (table, columns, unique, sample query) for the filters the views in
+# usuarios/views.py run on hot paths. The sample query is what --explain
+# shows a plan for.
+INDEXES = [
+    ('answers', ['form_id', 'user_id'], False,
+     'SELECT id FROM answers WHERE form_id = 1 AND user_id = 1'),
+    ('answers', ['user_id', 'form_id'], False,
+     'SELECT form_id FROM answers WHERE user_id = 1'),
+    ('comments', ['form_id', 'created_at', 'id'], False,
+     'SELECT id FROM comments WHERE form_id = 1 ORDER BY created_at, id LIMIT 51'),
+    ('likes', ['user_id', 'form_id'], True,
+     'SELECT id FROM likes WHERE user_id = 1 AND form_id = 1'),
+    ('likes', ['form_id'], False,
+     'SELECT count(*) FROM likes WHERE form_id = 1'),
+    ('forms', ['user_id', 'created_at', 'id'], False,
+     'SELECT id FROM forms WHERE user_id = 1 ORDER BY created_at, id LIMIT 51'),
+    ('forms', ['status', 'created_at'], False,
+     "SELECT id FROM forms WHERE status = 'active' ORDER BY created_at LIMIT 51"),
+    ('forms', ['created_at', 'id'], False,
+     'SELECT id FROM forms ORDER BY created_at, id LIMIT 51'),
+    ('forms', ['synced_at', 'id'], False,
+     "SELECT id FROM forms WHERE synced_at > '2024-01-01' ORDER BY synced_at, id LIMIT 201"),
+    ('questions', ['form_id'], False,
+     'SELECT id FROM questions WHERE form_id = 1'),
+    ('questions', ['updated_at', 'id'], False,
+     "SELECT id FROM questions WHERE updated_at > '2024-01-01' ORDER BY updated_at, id LIMIT 201"),
+    ('comments', ['updated_at', 'id'], False,
+     "SELECT id FROM comments WHERE updated_at > '2024-01-01' ORDER BY updated_at, id LIMIT 201"),
+    ('tombstones', ['deleted_at', 'id'], False,
+     "SELECT object_id FROM tombstones WHERE deleted_at > '2024-01-01' ORDER BY deleted_at, id LIMIT 201"),
+    ('submissions', ['user_id', 'form_id'], False,
+     'SELECT form_id FROM submissions WHERE user_id = 1'),
+    ('submissions', ['created_at', 'id'], False,
+     'SELECT id FROM submissions ORDER BY created_at, id LIMIT 51'),
+    ('users', ['created_at', 'id'], False,
+     'SELECT id FROM users ORDER BY created_at, id LIMIT 51'),
+]
+
+
+# GIN indexes behind search_forms; PostgreSQL only. (name, table, method and
+# columns, sample query). Built concurrently so writes to forms go on.
+SEARCH_INDEXES = [
+    ('forms_search_vector_idx', 'forms', 'GIN (search_vector)',
+     "SELECT id FROM forms WHERE search_vector @@ websearch_to_tsquery('simple', 'encuesta')"),
+    ('forms_title_trgm_idx', 'forms', 'GIN (title gin_trgm_ops)',
+     "SELECT id FROM forms WHERE title % 'encuesta'"),
+]
+
+
+def index_name(table, columns, unique):
+    suffix = 'uniq' if unique else 'idx'
+    return f"{table}_{'_'.join(columns)}_{suffix}"[:63]
+
+
+def is_covered(constraints, columns, unique):
+    for constraint in constraints.values():
+        if not (constraint['index'] or constraint['unique'] or constraint['primary_key']):
+            continue
+        existing = constraint['columns'] or []
+        if unique:
+            if constraint['unique'] and sorted(existing) == sorted(columns):
+                return True
+        elif existing[:len(columns)] == columns:
+            return True
+    return False
+
+
+def create_index_sql(table, columns, unique):
+    concurrently = ' CONCURRENTLY' if connection.vendor == 'postgresql' else ''
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    quote = connection.ops.quote_name
+    return (
+        f'CREATE {kind}{concurrently} IF NOT EXISTS {quote(index_name(table, columns, unique))} '
+        f"ON {quote(table)} ({', '.join(quote(column) for column in columns)})"
+    )
+
+
+class Command(BaseCommand):
+    help = 'Reports and creates the indexes the usuarios views rely on, since the unmanaged tables get none from migrations.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report missing indexes and the SQL that would create them.')
+        parser.add_argument('--explain', action='store_true', help='Show the query plan of each sample query.')
+
+    def handle(self, *args, **options):
+        tables = set(connection.introspection.table_names())
+        constraints = {}
+        missing = 0
+
+        for table, columns, unique, sample in INDEXES:
+            label = f"{table}({', '.join(columns)}){' unique' if unique else ''}"
+            if table not in tables:
+                self.stdout.write(f'SKIP     {label}: table does not exist')
+                continue
+
+            if table not in constraints:
+                with connection.cursor() as cursor:
+                    constraints[table] = connection.introspection.get_constraints(cursor, table)
+
+            if is_covered(constraints[table], columns, unique):
+                self.stdout.write(f'OK       {label}')
+            else:
+                missing += 1
+                sql = create_index_sql(table, columns, unique)
+                if options['dry_run']:
+                    self.stdout.write(f'MISSING  {label}: {sql}')
+                else:
+                    self.create(index_name(table, columns, unique), sql, label)
+
+            if options['explain']:
+                self.explain(sample)
+
+        if connection.vendor == 'postgresql':
+            for name, table, method, sample in SEARCH_INDEXES:
+                label = f'{table} {method}'
+                if table not in tables:
+                    self.stdout.write(f'SKIP     {label}: table does not exist')
+                    continue
+                if table not in constraints:
+                    with connection.cursor() as cursor:
+                        constraints[table] = connection.introspection.get_constraints(cursor, table)
+
+                if name in constraints[table]:
+                    self.stdout.write(f'OK       {label}')
+                else:
+                    missing += 1
+                    quote = connection.ops.quote_name
+                    sql = f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(name)} ON {quote(table)} USING {method}'
+                    if options['dry_run']:
+                        self.stdout.write(f'MISSING  {label}: {sql}')
+                    else:
+                        self.create(name, sql, label)
+
+                if options['explain']:
+                    self.explain(sample)
+
+        action = 'found' if options['dry_run'] else 'processed'
+        self.stdout.write(f'{missing} missing index(es) {action}')
+
+    def create(self, name, sql, label):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql)
+        except DatabaseError as exc:
+            # A failed concurrent build leaves an INVALID index behind that
+            # IF NOT EXISTS would skip on the next run.
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {connection.ops.quote_name(name)}')
+            self.stderr.write(f'FAILED   {label}: {exc}')
+        else:
+            self.stdout.write(f'CREATED  {label}')
+
+    def explain(self, sample):
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sample}')
+            for row in cursor.fetchall():
+                self.stdout.write('         ' + ' '.join(str(value) for value in row))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from usuarios.provisioning import provision_schema
+
+
+class Command(BaseCommand):
+    help = 'Creates the tables and columns the unmanaged usuarios models need but the database lacks.'
+
+    def handle(self, *args, **options):
+        changes = provision_schema()
+        for change in changes:
+            self.stdout.write(f'Created {change}')
+        if not changes:
+            self.stdout.write('Schema is up to date')
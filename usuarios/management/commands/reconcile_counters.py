@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from usuarios.models import Comment, Form, Like, Submission
+from usuarios.provisioning import ensure_columns
+
+COUNTERS = {
+    'likes_count': Like,
+    'comments_count': Comment,
+    'responses_count': Submission,
+}
+
+
+def _count(model):
+    total = model.objects.filter(form_id=OuterRef('pk')).order_by().values('form_id').annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(total), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized likes, comments and responses counters on forms.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        ensure_columns(Form, list(COUNTERS))
+        batch_size = options['batch_size']
+
+        last_id = 0
+        checked = 0
+        fixed = 0
+        while True:
+            with transaction.atomic():
+                # Locking the batch makes concurrent F() increments wait for
+                # the recount instead of being overwritten by it.
+                forms = list(
+                    Form.objects.select_for_update()
+                    .filter(id__gt=last_id)
+                    .order_by('id')
+                    .only('id', 'synced_at', *COUNTERS)
+                    .annotate(**{f'actual_{field}': _count(model) for field, model in COUNTERS.items()})
+                    [:batch_size]
+                )
+                if not forms:
+                    break
+
+                now = timezone.now()
+                drifted = []
+                for form in forms:
+                    changed = False
+                    for field in COUNTERS:
+                        actual = getattr(form, f'actual_{field}')
+                        if getattr(form, field) != actual:
+                            setattr(form, field, actual)
+                            changed = True
+                    if changed:
+                        form.synced_at = now
+                        drifted.append(form)
+                Form.objects.bulk_update(drifted, [*COUNTERS, 'synced_at'])
+
+            checked += len(forms)
+            fixed += len(drifted)
+            last_id = forms[-1].id
+
+        self.stdout.write(f'Checked {checked} forms, fixed {fixed}')
@@ -0,0 +1,176 @@
+import json
+import random
+import time
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from usuarios.models import Answer, Comment, Form, Like, Question, Submission, User
+
+QUESTION_TYPES = ['text', 'textarea', 'radio', 'checkbox', 'select']
+CHOICE_TYPES = {'radio', 'checkbox', 'select'}
+STATUSES = ['active', 'active', 'active', 'inactive']
+WORDS = (
+    'encuesta satisfaccion cliente producto servicio evento curso equipo opinion '
+    'calidad precio entrega soporte horario comida viaje salud deporte musica'
+).split()
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def popularity(rng, mean, limit):
+    """Draws a long-tailed count: most forms get a few rows, some get many."""
+    if mean <= 0:
+        return 0
+    return min(limit, int(rng.expovariate(1 / mean)))
+
+
+class FormPlan:
+    """Everything generated for one form, drawn from its own seeded RNG.
+
+    Seeding per form keeps the dataset identical for the same ``--seed``
+    whatever ``--batch-size`` is used.
+    """
+
+    def __init__(self, seed, index, user_ids, options):
+        self.rng = rng = random.Random(f'{seed}:{index}')
+        self.form = Form(
+            user_id=rng.choice(user_ids),
+            title=f'{sentence(rng, 3)} {index}',
+            description=sentence(rng, 12),
+            status=rng.choice(STATUSES),
+        )
+        self.questions = []
+        for _ in range(rng.randint(1, options['questions'] * 2 - 1)):
+            kind = rng.choice(QUESTION_TYPES)
+            choices = [sentence(rng, 1) for _ in range(rng.randint(2, 6))] if kind in CHOICE_TYPES else None
+            self.questions.append(Question(
+                type=kind,
+                question=f'{sentence(rng, 6)}?',
+                options=choices,
+                required=rng.random() < 0.7,
+            ))
+
+        limit = len(user_ids)
+        self.respondents = rng.sample(user_ids, popularity(rng, options['respondents'], limit))
+        self.likers = rng.sample(user_ids, popularity(rng, options['likes'], limit))
+        self.commenters = [rng.choice(user_ids) for _ in range(popularity(rng, options['comments'], limit))]
+
+        self.form.responses_count = len(self.respondents)
+        self.form.likes_count = len(self.likers)
+        self.form.comments_count = len(self.commenters)
+
+    def answer(self, question):
+        rng = self.rng
+        if question.type == 'checkbox':
+            return json.dumps(rng.sample(question.options, rng.randint(1, len(question.options))))
+        if question.options:
+            return rng.choice(question.options)
+        return sentence(rng, rng.randint(1, 20))
+
+    def answers(self):
+        for respondent in self.respondents:
+            for question in self.questions:
+                if question.required or self.rng.random() < 0.5:
+                    yield Answer(question=question, form=self.form, user_id=respondent, answer=self.answer(question))
+
+
+class Command(BaseCommand):
+    help = (
+        'Fills the database with a reproducible synthetic dataset for load and scale testing: '
+        'users, forms, questions, answers, submissions, comments and likes. '
+        'Run provision_schema first.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--forms', type=int, default=1000)
+        parser.add_argument('--questions', type=int, default=10, help='Mean questions per form.')
+        parser.add_argument('--respondents', type=int, default=50, help='Mean respondents per form.')
+        parser.add_argument('--comments', type=int, default=5, help='Mean comments per form.')
+        parser.add_argument('--likes', type=int, default=10, help='Mean likes per form.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='quizform', help='Password shared by every generated user.')
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['questions'] < 1:
+            self.stderr.write('--users and --questions must be at least 1')
+            return
+
+        seed = options['seed']
+        batch_size = options['batch_size']
+        start = time.perf_counter()
+
+        # Hashing is deliberately slow, so every user shares one hash.
+        password = make_password(options['password'])
+        user_ids = []
+        for chunk in chunked(range(options['users']), batch_size):
+            users = User.objects.bulk_create([
+                User(name=f'Usuario {number}', email=f'seed{seed}-{number}@quizform.invalid', password=password)
+                for number in chunk
+            ])
+            user_ids += [user.id for user in users]
+        self.stdout.write(f'Created {len(user_ids)} users')
+
+        totals = dict.fromkeys(['forms', 'questions', 'answers', 'submissions', 'comments', 'likes'], 0)
+        forms_per_chunk = max(1, batch_size // options['questions'])
+        for chunk in chunked(range(options['forms']), forms_per_chunk):
+            with transaction.atomic():
+                self.seed_forms([FormPlan(seed, index, user_ids, options) for index in chunk], batch_size, totals)
+            self.stdout.write(
+                f"Created {totals['forms']} forms, {totals['questions']} questions, {totals['answers']} answers"
+            )
+
+        elapsed = time.perf_counter() - start
+        summary = ', '.join(f'{count} {name}' for name, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(f'Seeded {summary} in {elapsed:.1f}s'))
+
+    def seed_forms(self, plans, batch_size, totals):
+        Form.objects.bulk_create([plan.form for plan in plans], batch_size=batch_size)
+        for plan in plans:
+            for question in plan.questions:
+                question.form = plan.form
+        Question.objects.bulk_create([question for plan in plans for question in plan.questions], batch_size=batch_size)
+
+        answers = (answer for plan in plans for answer in plan.answers())
+        for chunk in chunked(answers, batch_size):
+            Answer.objects.bulk_create(chunk)
+            totals['answers'] += len(chunk)
+
+        now = timezone.now()
+        Submission.objects.bulk_create([
+            Submission(form=plan.form, user_id=user_id, created_at=now)
+            for plan in plans
+            for user_id in plan.respondents
+        ], batch_size=batch_size)
+        Comment.objects.bulk_create([
+            Comment(form=plan.form, user_id=user_id, comment=sentence(plan.rng, plan.rng.randint(3, 30)))
+            for plan in plans
+            for user_id in plan.commenters
+        ], batch_size=batch_size)
+        Like.objects.bulk_create([
+            Like(form=plan.form, user_id=user_id)
+            for plan in plans
+            for user_id in plan.likers
+        ], batch_size=batch_size)
+
+        totals['forms'] += len(plans)
+        totals['questions'] += sum(len(plan.questions) for plan in plans)
+        totals['submissions'] += sum(len(plan.respondents) for plan in plans)
+        totals['comments'] += sum(len(plan.commenters) for plan in plans)
+        totals['likes'] += sum(len(plan.likers) for plan in plans)
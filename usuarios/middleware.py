@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+from .hashing import hashing_pool, request_queue_times
+
+logger = logging.getLogger('usuarios.performance')
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.started = time.perf_counter()
+        self.hashing_waits = []
+
+
+# The counter of the request being served. A context variable follows the
+# request into the threads sync_to_async runs the ORM in, which a wrapper
+# entered on the connections seen by the event loop would not.
+current_counter = ContextVar('current_counter', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = current_counter.get()
+    if counter is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        counter.count += 1
+        counter.duration += time.perf_counter() - start
+
+
+def install_query_counter(connection, **kwargs):
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+connection_created.connect(install_query_counter)
+
+
+class QueryInstrumentationMiddleware:
+    """Counts ORM queries and times each request.
+
+    Adds a ``Server-Timing`` header (``db``, ``view`` and ``total``), logs one
+    JSON line per request to ``usuarios.performance`` and logs it as a
+    warning when the request ran more than ``QUERY_BUDGET`` queries.
+    Requests that hashed a password also log their queue wait and the
+    hashing pool's ``stats()``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        counter, tokens = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(request, response, counter)
+
+    async def __acall__(self, request):
+        counter, tokens = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self.stop(tokens)
+        return self.finish(request, response, counter)
+
+    def start(self):
+        counter = QueryCounter()
+        return counter, (current_counter.set(counter), request_queue_times.set(counter.hashing_waits))
+
+    def stop(self, tokens):
+        counter_token, queue_token = tokens
+        current_counter.reset(counter_token)
+        request_queue_times.reset(queue_token)
+
+    def finish(self, request, response, counter):
+        total_ms = (time.perf_counter() - counter.started) * 1000
+        db_ms = counter.duration * 1000
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{counter.count} queries", '
+            f'view;dur={total_ms - db_ms:.1f}, '
+            f'total;dur={total_ms:.1f}'
+        )
+
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': counter.count,
+            'db_ms': round(db_ms, 2),
+            'view_ms': round(total_ms - db_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        if counter.hashing_waits:
+            record['hash_queue_ms'] = round(sum(counter.hashing_waits) * 1000, 2)
+            record['hashing_pool'] = hashing_pool.stats()
+        budget = getattr(settings, 'QUERY_BUDGET', 10)
+        if counter.count > budget:
+            record['over_budget'] = True
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+        return response
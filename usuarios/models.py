@@ -1,4 +1,5 @@
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 
 class CustomUserManager(BaseUserManager):
@@ -44,8 +45,15 @@ class Form(models.Model):
     title = models.CharField(max_length=150)
     description = models.TextField(null=True, blank=True)
     status = models.CharField(max_length=50, default='active')
+    likes_count = models.IntegerField(default=0)
+    comments_count = models.IntegerField(default=0)
+    responses_count = models.IntegerField(default=0)
+    search_vector = SearchVectorField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Moves on every change changes-since must report, counters included;
+    # updated_at only moves when the form is edited.
+    synced_at = models.DateTimeField(auto_now=True, null=True)
 
     class Meta:
         db_table = 'forms'
@@ -109,4 +117,30 @@ class Like(models.Model):
         managed = False
 
     def __str__(self):
-        return f"{self.user} liked {self.form}"
\ No newline at end of file
+        return f"{self.user} liked {self.form}"
+
+class Submission(models.Model):
+    form = models.ForeignKey(Form, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'submissions'
+        unique_together = ('form', 'user')
+        managed = False
+
+    def __str__(self):
+        return f"{self.user} answered {self.form}"
+
+class Tombstone(models.Model):
+    table = models.CharField(max_length=50)
+    object_id = models.IntegerField()
+    form_id = models.IntegerField(null=True)
+    deleted_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'tombstones'
+        managed = False
+
+    def __str__(self):
+        return f"{self.table} {self.object_id} deleted"
\ No newline at end of file
@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 50
+DEFAULT_MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+
+
+def page_size(request):
+    default = getattr(settings, 'PAGINATION_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    cap = getattr(settings, 'PAGINATION_MAX_PAGE_SIZE', DEFAULT_MAX_PAGE_SIZE)
+    try:
+        size = int(request.GET.get('limit', default))
+    except ValueError:
+        size = default
+    return max(1, min(size, cap))
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def after(queryset, position, time_field='created_at', id_field='id', descending=False):
+    """Filters ``queryset`` to the rows past a ``[timestamp, id]`` keyset position."""
+    if not isinstance(position, list) or len(position) != 2:
+        raise InvalidCursor(position)
+    if not isinstance(position[1], int) or isinstance(position[1], bool):
+        raise InvalidCursor(position)
+    try:
+        timestamp = parse_datetime(str(position[0]))
+    except ValueError:
+        raise InvalidCursor(position)
+    if timestamp is None or timezone.is_naive(timestamp):
+        raise InvalidCursor(position)
+    op = 'lt' if descending else 'gt'
+    return queryset.filter(
+        Q(**{f'{time_field}__{op}': timestamp}) |
+        Q(**{time_field: timestamp, f'{id_field}__{op}': position[1]})
+    )
+
+
+def position_of(row, time_field='created_at', id_field='id'):
+    return [_value(row, time_field).isoformat(), _value(row, id_field)]
+
+
+def paginate(queryset, request, ordering=('created_at', 'id')):
+    """Keyset-paginates ``queryset`` on the ``(timestamp, id)`` pair in ``ordering``.
+
+    Both fields must sort in the same direction. Returns the rows of the
+    requested page and the cursor for the next one (``None`` on the last
+    page). One extra row is fetched to detect the end, so no COUNT or OFFSET
+    is ever issued.
+    """
+    descending = ordering[0].startswith('-')
+    time_field, id_field = (field.lstrip('-') for field in ordering)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        queryset = after(queryset, decode_cursor(cursor), time_field, id_field, descending)
+
+    size = page_size(request)
+    rows = list(queryset.order_by(*ordering)[:size + 1])
+    if len(rows) <= size:
+        return rows, None
+
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(position_of(last, time_field, id_field))
+
+
+def paginate_ranked(queryset, request):
+    """Paginates an already ordered ``queryset`` by offset.
+
+    For orderings with no stable keyset, such as search rank. The cursor
+    holds the offset of the next page and, as in ``paginate``, one extra row
+    is fetched to detect the end.
+    """
+    cursor = request.GET.get('cursor')
+    offset = decode_cursor(cursor) if cursor else 0
+    if not isinstance(offset, int) or isinstance(offset, bool) or offset < 0:
+        raise InvalidCursor(cursor)
+
+    size = page_size(request)
+    rows = list(queryset[offset:offset + size + 1])
+    if len(rows) <= size:
+        return rows, None
+    return rows[:size], encode_cursor(offset + size)
+
+
+def paginated_response(request, data, next_cursor, status=200):
+    response = JsonResponse(data, safe=False, status=status)
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
+        response['X-Next-Cursor'] = next_cursor
+        response['Link'] = f'<{next_url}>; rel="next"'
+    return response
@@ -0,0 +1,80 @@
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+
+from .models import Form, Submission, Tombstone
+from .search import provision_search
+
+# The usuarios models are unmanaged, so migrations never touch the database.
+# Tables and columns listed here are created by ``provision_schema`` when
+# they are missing.
+PROVISIONED_TABLES = [Submission, Tombstone]
+
+PROVISIONED_COLUMNS = [
+    (Form, ['likes_count', 'comments_count', 'responses_count', 'search_vector', 'synced_at']),
+]
+
+
+def backfill_synced_at():
+    Form.objects.filter(synced_at__isnull=True).update(synced_at=F('updated_at'))
+
+
+def reconcile_counters():
+    call_command('reconcile_counters')
+
+
+def backfill_submissions():
+    call_command('backfill_submissions')
+
+
+# Run once, right after provision_schema creates the table or column they
+# are keyed by, so existing rows are not served empty or zeroed. Tables are
+# created first, so submissions are backfilled before responses_count is
+# recounted from them.
+AFTER_CREATE = {
+    'submissions': backfill_submissions,
+    'forms.likes_count': reconcile_counters,
+    'forms.comments_count': reconcile_counters,
+    'forms.responses_count': reconcile_counters,
+    'forms.synced_at': backfill_synced_at,
+}
+
+
+def ensure_tables(models):
+    existing = set(connection.introspection.table_names())
+    created = []
+    with connection.schema_editor() as editor:
+        for model in models:
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+                created.append(model._meta.db_table)
+    return created
+
+
+def ensure_columns(model, field_names):
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        existing = {column.name for column in connection.introspection.get_table_description(cursor, table)}
+    created = []
+    with connection.schema_editor() as editor:
+        for name in field_names:
+            field = model._meta.get_field(name)
+            if field.column not in existing:
+                editor.add_field(model, field)
+                created.append(f'{table}.{field.column}')
+    return created
+
+
+def provision_schema():
+    changes = ensure_tables(PROVISIONED_TABLES)
+    for model, field_names in PROVISIONED_COLUMNS:
+        changes += ensure_columns(model, field_names)
+    hooks = []
+    for change in changes:
+        hook = AFTER_CREATE.get(change)
+        if hook is not None and hook not in hooks:
+            hooks.append(hook)
+    for hook in hooks:
+        hook()
+    changes += provision_search()
+    return changes
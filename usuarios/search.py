@@ -0,0 +1,79 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection, transaction
+from django.db.models import F, Q
+
+from .models import Form
+
+SEARCH_CONFIG = 'simple'
+
+SEARCH_TRIGGER = 'forms_search_vector_trigger'
+BACKFILL_BATCH_SIZE = 5000
+
+# Arbitrary key for the advisory lock that keeps workers booting together
+# from racing on the trigger DDL.
+SEARCH_LOCK_ID = 727_001
+
+# forms.search_vector is kept up to date by a trigger, so searches only read
+# the stored vector through its GIN index instead of rebuilding it per row.
+# The GIN and trigram indexes are built by provision_indexes.
+SEARCH_SETUP_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    f"""
+    CREATE OR REPLACE FUNCTION forms_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.title, '')), 'A') ||
+            setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(NEW.description, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TRIGGER}
+    BEFORE INSERT OR UPDATE OF title, description ON forms
+    FOR EACH ROW EXECUTE FUNCTION forms_search_vector_update()
+    """,
+]
+
+BACKFILL_SQL = f"""
+    UPDATE forms SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')
+    WHERE id IN (SELECT id FROM forms WHERE search_vector IS NULL LIMIT %s)
+"""
+
+
+def provision_search():
+    """Installs the search trigger once and backfills existing rows in batches.
+
+    Runs on every boot, so when the trigger already exists it only costs
+    one catalog lookup.
+    """
+    if connection.vendor != 'postgresql':
+        return []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", [SEARCH_LOCK_ID])
+        cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = %s AND NOT tgisinternal", [SEARCH_TRIGGER])
+        if cursor.fetchone():
+            return []
+        for statement in SEARCH_SETUP_SQL:
+            cursor.execute(statement)
+
+    # Short autocommitted batches keep row locks brief on a large table.
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(BACKFILL_SQL, [BACKFILL_BATCH_SIZE])
+            if cursor.rowcount == 0:
+                break
+    return ['forms search vector trigger']
+
+
+def search_forms_queryset(query):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return Form.objects.annotate(
+        rank=SearchRank(F('search_vector'), search_query),
+        similarity=TrigramSimilarity('title', query),
+    ).filter(
+        Q(search_vector=search_query) |
+        Q(title__trigram_similar=query)
+    ).order_by('-rank', '-similarity', '-id')
@@ -0,0 +1,38 @@
+from django.db import connection
+
+from .models import Submission
+
+
+def record_submissions(form_id, user_ids, created_at):
+    """Inserts a submission for each of ``user_ids`` that has none yet and returns how many were new.
+
+    On PostgreSQL the count comes from ``INSERT ... ON CONFLICT DO NOTHING
+    RETURNING``, so two concurrent first submissions by the same user count
+    once. Elsewhere the existing rows are read first; SQLite serializes the
+    writers, so the read cannot go stale before the insert.
+    """
+    if not user_ids:
+        return 0
+    if connection.vendor == 'postgresql':
+        quote = connection.ops.quote_name
+        table = quote(Submission._meta.db_table)
+        values = ', '.join(['(%s, %s, %s)'] * len(user_ids))
+        params = [value for user_id in user_ids for value in (form_id, user_id, created_at)]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({quote('form_id')}, {quote('user_id')}, {quote('created_at')}) "
+                f"VALUES {values} "
+                f"ON CONFLICT ({quote('form_id')}, {quote('user_id')}) DO NOTHING "
+                f"RETURNING {quote('user_id')}",
+                params,
+            )
+            return len(cursor.fetchall())
+
+    new = set(user_ids) - set(
+        Submission.objects.filter(form_id=form_id, user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    Submission.objects.bulk_create(
+        [Submission(form_id=form_id, user_id=user_id, created_at=created_at) for user_id in new],
+        ignore_conflicts=True,
+    )
+    return len(new)
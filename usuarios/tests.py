@@ -1,3 +1,906 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Count
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import answered, export, form_schema, provisioning
+from .authentication import CachedJWTAuthentication, issue_tokens
+from .cache import FORMS_TAG, local_cache, single_flight, tag_versions
+from .last_login import buffer, record_last_login
+from .middleware import QueryInstrumentationMiddleware
+from .pagination import encode_cursor
+from .models import User, Form, Question, Answer, Comment, Like, Submission
+
+
+class QueryBudgetTests(TestCase):
+    """Each endpoint must run the same number of queries however much data exists.
+
+    Every test calls the endpoint twice, growing the dataset in between, and
+    checks both calls against the same ``assertNumQueries`` budget.
+    """
+
+    FORMS = 20
+    QUESTIONS = 5
+    RESPONDENTS = 5
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta', description='Principal')
+        self.questions = Question.objects.bulk_create([
+            Question(form=self.form, type='text', question=f'Pregunta {number}')
+            for number in range(self.QUESTIONS)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.batch = 0
+
+    def grow(self):
+        """Adds FORMS forms with QUESTIONS questions each, answered by RESPONDENTS new users."""
+        self.batch += 1
+        respondents = User.objects.bulk_create([
+            User(name=f'User {self.batch}-{number}', email=f'user{self.batch}-{number}@example.com', password='!')
+            for number in range(self.RESPONDENTS)
+        ])
+        forms = Form.objects.bulk_create([
+            Form(user=respondents[number % self.RESPONDENTS], title=f'Form {self.batch}-{number}')
+            for number in range(self.FORMS)
+        ])
+        questions = Question.objects.bulk_create([
+            Question(form=form, type='radio', question=f'Question {number}', options=['a', 'b'])
+            for form in forms
+            for number in range(self.QUESTIONS)
+        ])
+
+        answered = [(question, respondent) for question in questions + self.questions for respondent in respondents]
+        Answer.objects.bulk_create([
+            Answer(form_id=question.form_id, question=question, user=respondent, answer='a')
+            for question, respondent in answered
+        ])
+        Submission.objects.bulk_create([
+            Submission(form=form, user=respondent, created_at=form.created_at)
+            for form in forms + [self.form]
+            for respondent in respondents
+        ])
+        Comment.objects.bulk_create([
+            Comment(form=form, user=respondent, comment='Comentario')
+            for form in forms + [self.form]
+            for respondent in respondents
+        ])
+        Like.objects.bulk_create([
+            Like(form=form, user=respondent)
+            for form in forms + [self.form]
+            for respondent in respondents
+        ])
+        cache.clear()
+        local_cache.clear()
+
+    def assertConstantQueries(self, expected, request):
+        for _ in range(2):
+            self.grow()
+            with self.assertNumQueries(expected):
+                response = request()
+            self.assertLess(response.status_code, 400, getattr(response, 'content', b''))
+        return response
+
+    def send(self, method, path, data):
+        return getattr(self.client, method)(path, data=json.dumps(data), content_type='application/json')
+
+    def test_get_users(self):
+        self.assertConstantQueries(1, lambda: self.client.get('/forms/get-users/'))
+
+    def test_log_in(self):
+        self.user.set_password('secreto')
+        self.user.save()
+        self.assertConstantQueries(2, lambda: self.send('post', '/forms/get-users/', {
+            'email': self.user.email, 'password': 'secreto',
+        }))
+
+    def test_update_user(self):
+        self.assertConstantQueries(2, lambda: self.send('put', '/forms/get-users/', {
+            'id': self.user.id, 'role': 'admin',
+        }))
+
+    def test_create_user(self):
+        emails = iter(['nuevo1@example.com', 'nuevo2@example.com'])
+        self.assertConstantQueries(2, lambda: self.send('post', '/forms/create-user/', {
+            'name': 'Nuevo', 'email': next(emails), 'password': 'secreto',
+        }))
+
+    def test_async_log_in(self):
+        self.user.set_password('secreto')
+        self.user.save()
+        self.assertConstantQueries(2, lambda: self.send('post', '/forms/log-in/', {
+            'email': self.user.email, 'password': 'secreto',
+        }))
+
+    def test_async_sign_up(self):
+        emails = iter(['async1@example.com', 'async2@example.com'])
+        self.assertConstantQueries(2, lambda: self.send('post', '/forms/sign-up/', {
+            'name': 'Nuevo', 'email': next(emails), 'password': 'secreto',
+        }))
+
+    def test_get_forms(self):
+        self.assertConstantQueries(3, lambda: self.client.get('/forms/forms-info/'))
+
+    def test_create_form(self):
+        self.assertConstantQueries(2, lambda: self.send('post', '/forms/forms-info/', {
+            'user_id': self.user.id, 'title': 'Nueva', 'description': 'Descripcion',
+        }))
+
+    def test_update_form(self):
+        self.assertConstantQueries(3, lambda: self.send('put', '/forms/forms-info/', {
+            'id': self.form.id, 'title': 'Editada', 'description': 'Nueva', 'status': 'active',
+        }))
+
+    def test_delete_form(self):
+        forms = iter(Form.objects.bulk_create([Form(user=self.user, title=f'Borrar {n}') for n in range(2)]))
+        self.assertConstantQueries(10, lambda: self.send('delete', '/forms/forms-info/', {'id': next(forms).id}))
+
+    def test_user_forms(self):
+        self.assertConstantQueries(3, lambda: self.client.get(f'/forms/forms-info/{self.user.id}/'))
+
+    def test_feed(self):
+        self.assertConstantQueries(1, lambda: self.client.get('/forms/feed/'))
+
+    def test_get_question(self):
+        self.assertConstantQueries(3, lambda: self.client.get(f'/forms/get-question/{self.form.id}/'))
+
+    def test_get_question_cached(self):
+        self.client.get(f'/forms/get-question/{self.form.id}/')
+        with self.assertNumQueries(0):
+            self.client.get(f'/forms/get-question/{self.form.id}/')
+
+    def test_create_questions(self):
+        self.assertConstantQueries(4, lambda: self.send('post', f'/forms/get-question/{self.form.id}/', [
+            {'type': 'text', 'question': f'Nueva {number}', 'required': True}
+            for number in range(10)
+        ]))
+
+    def test_update_questions(self):
+        self.assertConstantQueries(5, lambda: self.send('put', f'/forms/get-question/{self.form.id}/', [
+            {'question_id': question.id, 'question': 'Editada', 'type': 'text', 'options': None}
+            for question in self.questions
+        ] + [{'question': 'Nueva', 'type': 'text'}]))
+
+    def test_get_answers(self):
+        self.assertConstantQueries(2, lambda: self.client.get(f'/forms/get-answer/{self.form.id}/'))
+
+    def test_create_answers(self):
+        respondents = iter(User.objects.bulk_create([
+            User(name=f'Nuevo {n}', email=f'nuevo{n}@example.com', password='!') for n in range(2)
+        ]))
+
+        def submit():
+            respondent = next(respondents)
+            return self.send('post', f'/forms/get-answer/{self.form.id}/', [
+                {'question_id': question.id, 'user_id': respondent.id, 'answer': 'b'}
+                for question in self.questions
+            ])
+
+        self.assertConstantQueries(7, submit)
+
+    def test_changes_since(self):
+        self.assertConstantQueries(4, lambda: self.client.get('/forms/changes-since/'))
+
+    def test_export_answers(self):
+        def export():
+            response = self.client.get(f'/forms/export/{self.form.id}/csv/')
+            b''.join(response.streaming_content)
+            return response
+
+        self.assertConstantQueries(3, export)
+
+    def test_get_submissions(self):
+        self.assertConstantQueries(1, lambda: self.client.get('/forms/get-answers/'))
+
+    def test_unanswered_forms(self):
+        self.assertConstantQueries(2, lambda: self.client.get(f'/forms/unanswered-forms/{self.user.id}/'))
+
+    def test_get_comments(self):
+        self.assertConstantQueries(3, lambda: self.client.get(f'/forms/comments/{self.form.id}/'))
+
+    def test_new_comment(self):
+        self.assertConstantQueries(6, lambda: self.send('post', f'/forms/comments/{self.form.id}/', {
+            'user_id': self.user.id, 'comment': 'Hola',
+        }))
+
+    def test_delete_comment(self):
+        comments = iter(Comment.objects.bulk_create([
+            Comment(form=self.form, user=self.user, comment='Borrar') for _ in range(2)
+        ]))
+        self.assertConstantQueries(6, lambda: self.client.delete(f'/forms/comment/{next(comments).id}/'))
+
+    def test_get_likes(self):
+        self.assertConstantQueries(2, lambda: self.client.get(f'/forms/likes/{self.form.id}/'))
+
+    def test_give_like(self):
+        forms = iter(Form.objects.bulk_create([Form(user=self.user, title=f'Like {n}') for n in range(2)]))
+        self.assertConstantQueries(7, lambda: self.client.post(f'/forms/likes/{next(forms).id}/'))
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL')
+    def test_search_forms(self):
+        self.assertConstantQueries(1, lambda: self.client.get('/forms/search-forms/', {'query': 'Form'}))
+
+
+class FormSchemaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.question = Question.objects.create(form=self.form, type='text', question='old')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_write_during_compile_does_not_pin_stale_schema(self):
+        compile_form_schema = form_schema.compile_form_schema
+
+        def compile_then_write(form):
+            blob = compile_form_schema(form)
+            self.client.put(f'/forms/get-question/{self.form.id}/', data=json.dumps([{
+                'question_id': self.question.id, 'question': 'new', 'type': 'text', 'options': None,
+            }]), content_type='application/json')
+            return blob
+
+        with mock.patch.object(form_schema, 'compile_form_schema', compile_then_write):
+            self.assertEqual(form_schema.get_form_schema(self.form.id)['questions'][0]['question'], 'old')
+
+        self.assertEqual(form_schema.get_form_schema(self.form.id)['questions'][0]['question'], 'new')
+        response = self.client.get(f'/forms/get-question/{self.form.id}/')
+        self.assertEqual(response.json()[0]['question'], 'new')
+
+    def test_answers_comments_and_likes_keep_the_schema(self):
+        path = f'/forms/get-question/{self.form.id}/'
+        etag = self.client.get(path)['ETag']
+        self.client.post(f'/forms/get-answer/{self.form.id}/', data=json.dumps([
+            {'question_id': self.question.id, 'user_id': self.user.id, 'answer': 'Si'},
+        ]), content_type='application/json')
+        self.client.post(f'/forms/likes/{self.form.id}/')
+        self.client.post(f'/forms/comments/{self.form.id}/', data=json.dumps({
+            'user_id': self.user.id, 'comment': 'Hola',
+        }), content_type='application/json')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(path).status_code, 200)
+
+    def test_update_accepts_string_question_ids(self):
+        response = self.client.put(f'/forms/get-question/{self.form.id}/', data=json.dumps([{
+            'question_id': str(self.question.id), 'question': 'new', 'type': 'text', 'options': None,
+        }]), content_type='application/json')
+        self.assertEqual(response.json(), [{'status': 'updated', 'question_id': self.question.id}])
+        self.assertEqual(list(Question.objects.values_list('question', flat=True)), ['new'])
+
+        response = self.client.put(f'/forms/get-question/{self.form.id}/', data=json.dumps([{
+            'question_id': 'abc', 'question': 'new', 'type': 'text', 'options': None,
+        }]), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class GiveLikeTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_repeat_like_is_rejected_before_insert(self):
+        self.assertEqual(self.client.post(f'/forms/likes/{self.form.id}/').status_code, 201)
+        with mock.patch.object(Like.objects, 'create', side_effect=AssertionError('inserted twice')):
+            self.assertEqual(self.client.post(f'/forms/likes/{self.form.id}/').status_code, 400)
+        self.assertEqual(Form.objects.get(id=self.form.id).likes_count, 1)
+
+
+class AnsweredFormsCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+
+    def test_submission_during_warm_does_not_pin_stale_ids(self):
+        answered_form_ids = answered.answered_form_ids
+
+        def query_then_submit(user_id):
+            form_ids = answered_form_ids(user_id)
+            Submission.objects.create(form=self.form, user=self.user, created_at=timezone.now())
+            answered.invalidate_answered_forms({self.user.id})
+            return form_ids
+
+        with mock.patch.object(answered, 'answered_form_ids', query_then_submit):
+            answered.warm_answered_form_ids(self.user.id)
+
+        self.assertIsNone(answered.cached_answered_form_ids(self.user.id))
+        answered.warm_answered_form_ids(self.user.id)
+        self.assertEqual(answered.cached_answered_form_ids(self.user.id), {self.form.id})
+
+
+class CachedAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='secret-hash', role='admin')
+        access_token, _ = issue_tokens(self.user)
+        self.authentication = CachedJWTAuthentication()
+        self.token = self.authentication.get_validated_token(access_token.encode())
+
+    def test_cached_user_leaves_out_the_password(self):
+        self.authentication.get_user(self.token)
+        self.assertEqual(cache.get(f'auth-user:{self.user.id}'),
+                         {'name': 'Owner', 'email': 'owner@example.com', 'role': 'admin'})
+
+        with self.assertNumQueries(0):
+            user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.name, user.role), (self.user.id, 'Owner', 'admin'))
+        self.assertFalse(user.password)
+
+
+class QueryInstrumentationMiddlewareTests(TestCase):
+    async def test_async_requests_are_counted(self):
+        async def get_response(request):
+            await User.objects.acount()
+            return HttpResponse()
+
+        middleware = QueryInstrumentationMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_sync_requests_are_counted(self):
+        def get_response(request):
+            User.objects.count()
+            return HttpResponse()
+
+        response = QueryInstrumentationMiddleware(get_response)(RequestFactory().get('/'))
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
+
+    def test_password_hashing_is_logged_with_pool_stats(self):
+        with self.assertLogs('usuarios.performance', 'INFO') as logs:
+            self.client.post('/forms/sign-up/', data=json.dumps({
+                'name': 'Nuevo', 'email': 'nuevo@example.com', 'password': 'secreto',
+            }), content_type='application/json')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertIn('hash_queue_ms', record)
+        self.assertGreaterEqual(record['hashing_pool']['completed'], 1)
+
+
+class GetAnswersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.questions = Question.objects.bulk_create([
+            Question(form=self.form, type='text', question='Uno'),
+            Question(form=self.form, type='text', question='Dos'),
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def answer_as(self, *names):
+        for name in names:
+            respondent = User.objects.create(name=name, email=f'{name.lower()}@example.com', password='!')
+            Answer.objects.bulk_create([
+                Answer(form=self.form, question=question, user=respondent, answer=f'{name} {question.question}')
+                for question in self.questions
+            ])
+
+    def test_rows_carry_their_own_respondent(self):
+        self.answer_as('Ana', 'Luis')
+        rows = self.client.get(f'/forms/get-answer/{self.form.id}/').json()
+        self.assertEqual(len(rows), 4)
+        for row in rows:
+            self.assertEqual(row['answer'], f"{row['user_name']} {row['question_id']}")
+            self.assertEqual(row['form_id'], 'Encuesta')
+        self.assertEqual({row['user_name'] for row in rows}, {'Ana', 'Luis'})
+
+    def test_grouped_by_respondent(self):
+        self.answer_as('Ana', 'Luis')
+        groups = self.client.get(f'/forms/get-answer/{self.form.id}/', {'group': 'respondent'}).json()
+        self.assertEqual([group['user_name'] for group in groups], ['Ana', 'Luis'])
+        for group in groups:
+            self.assertEqual(set(group), {'user_id', 'user_name', 'created_at', 'answers'})
+            self.assertEqual([answer['question_id'] for answer in group['answers']], ['Uno', 'Dos'])
+            self.assertTrue(all(answer['user_name'] == group['user_name'] for answer in group['answers']))
+
+    def test_no_answers(self):
+        for params in [{}, {'group': 'respondent'}]:
+            response = self.client.get(f'/forms/get-answer/{self.form.id}/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), [])
+
+
+class CreateAnswersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.question = Question.objects.create(form=self.form, type='text', question='Pregunta')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def submit(self, answers):
+        return self.client.post(f'/forms/get-answer/{self.form.id}/', data=json.dumps(answers),
+                                content_type='application/json')
+
+    def test_string_ids_are_accepted(self):
+        response = self.submit([{'question_id': str(self.question.id), 'user_id': str(self.user.id), 'answer': 'Si'}])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Answer.objects.get().question_id, self.question.id)
+
+    def test_non_integer_ids_are_rejected(self):
+        for answer in [{'question_id': 'abc', 'user_id': None}, {'question_id': None, 'user_id': None},
+                       {'question_id': self.question.id, 'user_id': [1]}]:
+            response = self.submit([dict(answer, answer='Si')])
+            self.assertEqual(response.status_code, 400, answer)
+        self.assertFalse(Answer.objects.exists())
+
+    def test_responses_count_counts_each_respondent_once(self):
+        for _ in range(2):
+            self.submit([{'question_id': self.question.id, 'user_id': self.user.id, 'answer': 'Si'}])
+        self.form.refresh_from_db()
+        self.assertEqual(self.form.responses_count, 1)
+        self.assertEqual(Submission.objects.count(), 1)
+
+
+class PaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_cursor_walk_returns_every_row_once(self):
+        forms = Form.objects.bulk_create([Form(user=self.user, title=f'Form {n}') for n in range(11)])
+        # Shared timestamps make the id tie-breaker carry the walk.
+        same = timezone.now()
+        Form.objects.filter(id__in=[form.id for form in forms[3:8]]).update(created_at=same)
+
+        seen = []
+        params = {'limit': 3}
+        while True:
+            response = self.client.get('/forms/forms-info/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [form['id'] for form in response.json()]
+            if 'X-Next-Cursor' not in response:
+                break
+            params['cursor'] = response['X-Next-Cursor']
+        self.assertEqual(sorted(seen), sorted(form.id for form in forms))
+        self.assertEqual(len(seen), len(set(seen)))
+
+    def test_malformed_cursors_are_rejected(self):
+        for position in [
+            ['2020-01-01T00:00:00+00:00', 'abc'],
+            ['2020-01-01T00:00:00+00:00', True],
+            ['2020-01-01T00:00:00', 1],
+            ['2020-13-45T00:00:00+00:00', 1],
+            ['not a date', 1],
+            {'id': 1},
+        ]:
+            response = self.client.get('/forms/forms-info/', {'cursor': encode_cursor(position)})
+            self.assertEqual(response.status_code, 400, position)
+
+    def test_search_results_walk_by_rank_offset(self):
+        forms = Form.objects.bulk_create([Form(user=self.user, title=f'Encuesta {n}') for n in range(7)])
+        ranked = Form.objects.order_by('-id')
+        seen = []
+        params = {'query': 'Encuesta', 'limit': 3}
+        with mock.patch('usuarios.views.search_forms_queryset', return_value=ranked):
+            while True:
+                response = self.client.get('/forms/search-forms/', params)
+                self.assertEqual(response.status_code, 200)
+                seen += [form['id'] for form in response.json()]
+                if 'X-Next-Cursor' not in response:
+                    break
+                params['cursor'] = response['X-Next-Cursor']
+            response = self.client.get('/forms/search-forms/', {'query': 'Encuesta', 'cursor': encode_cursor(-1)})
+        self.assertEqual(seen, sorted((form.id for form in forms), reverse=True))
+        self.assertEqual(response.status_code, 400)
+
+
+class ChangesSinceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.question = Question.objects.create(form=self.form, type='text', question='Pregunta')
+        self.comment = Comment.objects.create(form=self.form, user=self.user, comment='Hola')
+
+    def sync(self, **params):
+        response = self.client.get('/forms/changes-since/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_full_sync_then_empty_diff(self):
+        changes = self.sync()
+        self.assertEqual([form['id'] for form in changes['forms']], [self.form.id])
+        self.assertEqual([question['id'] for question in changes['questions']], [self.question.id])
+        self.assertEqual([comment['name'] for comment in changes['comments']], ['Owner'])
+        self.assertFalse(changes['has_more'])
+
+        diff = self.sync(cursor=changes['cursor'])
+        self.assertEqual((diff['forms'], diff['questions'], diff['comments']), ([], [], []))
+        self.assertEqual(diff['deleted'], {'forms': [], 'comments': []})
+
+    def test_updates_and_deletions(self):
+        cursor = self.sync()['cursor']
+        self.client.put('/forms/forms-info/', data=json.dumps({
+            'id': self.form.id, 'title': 'Editada', 'description': '', 'status': 'active',
+        }), content_type='application/json')
+        self.client.delete(f'/forms/comment/{self.comment.id}/')
+
+        diff = self.sync(cursor=cursor)
+        self.assertEqual([form['title'] for form in diff['forms']], ['Editada'])
+        self.assertEqual(diff['questions'], [])
+        self.assertEqual(diff['deleted'], {'forms': [], 'comments': [self.comment.id]})
+
+        self.client.delete('/forms/forms-info/', data=json.dumps({'id': self.form.id}), content_type='application/json')
+        diff = self.sync(cursor=diff['cursor'])
+        self.assertEqual(diff['deleted'], {'forms': [self.form.id], 'comments': []})
+
+    def test_counter_changes_are_synced(self):
+        cursor = self.sync()['cursor']
+        self.client.post(f'/forms/likes/{self.form.id}/')
+        diff = self.sync(cursor=cursor)
+        self.assertEqual([form['likes_count'] for form in diff['forms']], [1])
+        self.assertEqual(Form.objects.get(id=self.form.id).updated_at, self.form.updated_at)
+
+        comments_count = diff['forms'][0]['comments_count']
+        self.client.post(f'/forms/comments/{self.form.id}/', data=json.dumps({
+            'user_id': self.user.id, 'comment': 'Otro',
+        }), content_type='application/json')
+        diff = self.sync(cursor=diff['cursor'])
+        self.assertEqual([form['comments_count'] for form in diff['forms']], [comments_count + 1])
+
+    def test_pages_through_each_table(self):
+        Form.objects.bulk_create([Form(user=self.user, title=f'Form {n}') for n in range(4)])
+        changes = self.sync(limit=2)
+        self.assertTrue(changes['has_more'])
+        seen = [form['id'] for form in changes['forms']]
+        while changes['has_more']:
+            changes = self.sync(limit=2, cursor=changes['cursor'])
+            seen += [form['id'] for form in changes['forms']]
+        self.assertEqual(sorted(seen), sorted(Form.objects.values_list('id', flat=True)))
+
+    def test_since_timestamp(self):
+        since = timezone.now()
+        new_form = Form.objects.create(user=self.user, title='Nuevo')
+        changes = self.sync(since=since.isoformat())
+        self.assertEqual([form['id'] for form in changes['forms']], [new_form.id])
+        self.assertEqual(changes['questions'], [])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/forms/changes-since/', {'cursor': 'nope'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportAnswersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.questions = Question.objects.bulk_create([
+            Question(form=self.form, type='text', question='Nombre'),
+            Question(form=self.form, type='radio', question='Color', options=['rojo', 'azul']),
+        ])
+        ana = User.objects.create(name='Ana', email='ana@example.com', password='!')
+        luis = User.objects.create(name='Luis', email='luis@example.com', password='!')
+        now = timezone.now()
+        Answer.objects.bulk_create([
+            Answer(form=self.form, question=self.questions[0], user=ana, answer='Ana', created_at=now),
+            Answer(form=self.form, question=self.questions[1], user=ana, answer='rojo', created_at=now),
+            Answer(form=self.form, question=self.questions[1], user=luis, answer='azul, "claro"', created_at=now),
+            Answer(form=self.form, question=self.questions[0], user=None, answer='Anonimo', created_at=now),
+            Answer(form=self.form, question=self.questions[0], user=None, answer='Otro',
+                   created_at=now + timezone.timedelta(seconds=1)),
+        ])
+
+    def export(self, export_format):
+        response = self.client.get(f'/forms/export/{self.form.id}/{export_format}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_one_row_per_respondent(self):
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(rows[0], ['respondent_id', 'respondent_name', 'submitted_at', 'Nombre', 'Color'])
+        by_name = {row[1]: row[3:] for row in rows[1:]}
+        self.assertEqual(by_name['Ana'], ['Ana', 'rojo'])
+        self.assertEqual(by_name['Luis'], ['', 'azul, "claro"'])
+        self.assertEqual(sorted(row[3] for row in rows[1:] if not row[0]), ['Anonimo', 'Otro'])
+        self.assertEqual(len(rows), 5)
+
+    def test_ndjson(self):
+        rows = [json.loads(line) for line in self.export('ndjson').splitlines()]
+        self.assertEqual(len(rows), 4)
+        ana = next(row for row in rows if row['respondent_name'] == 'Ana')
+        self.assertEqual(ana['answers'], {str(self.questions[0].id): 'Ana', str(self.questions[1].id): 'rojo'})
+
+    async def test_asgi_export_streams_lazily(self):
+        produced = []
+
+        def stream_csv(form_id):
+            for line in export.stream_csv(form_id):
+                produced.append(line)
+                yield line
+
+        access_token, _ = await sync_to_async(issue_tokens)(self.user)
+        client = AsyncClient()
+        with mock.patch.dict(export.STREAMS, {'csv': stream_csv}), \
+                mock.patch.object(export, 'EXPORT_LINES_PER_CHUNK', 1):
+            response = await client.get(f'/forms/export/{self.form.id}/csv/',
+                                        headers={'Authorization': f'Bearer {access_token}'})
+            self.assertEqual(response.status_code, 200)
+            chunks = aiter(response.streaming_content)
+            first = await anext(chunks)
+            self.assertEqual(len(produced), 1)
+            rest = [chunk async for chunk in chunks]
+        self.assertTrue(first.startswith(b'respondent_id,'))
+        self.assertEqual(len(rest), 4)
+
+    def test_unknown_format_and_form(self):
+        self.assertEqual(self.client.get(f'/forms/export/{self.form.id}/xlsx/').status_code, 400)
+        self.assertEqual(self.client.get('/forms/export/999999/csv/').status_code, 404)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_read_views_are_cached(self):
+        for path in ['/forms/get-users/', '/forms/forms-info/', f'/forms/forms-info/{self.user.id}/',
+                     '/forms/feed/', f'/forms/get-answer/{self.form.id}/', '/forms/get-answers/',
+                     f'/forms/unanswered-forms/{self.user.id}/', f'/forms/comments/{self.form.id}/',
+                     f'/forms/likes/{self.form.id}/']:
+            first = self.client.get(path)
+            with self.assertNumQueries(0):
+                second = self.client.get(path)
+            self.assertEqual(second.content, first.content, path)
+
+    def test_shared_tier_survives_local_eviction(self):
+        first = self.client.get('/forms/forms-info/')
+        local_cache.clear()
+        with self.assertNumQueries(0):
+            second = self.client.get('/forms/forms-info/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_log_in_refreshes_user_list(self):
+        self.assertIsNone(self.client.get('/forms/get-users/').json()[0]['last_login'])
+        record_last_login(self.user)
+        logged_in = self.client.get('/forms/get-users/').json()[0]['last_login']
+        self.assertIsNotNone(logged_in)
+
+        with self.settings(LAST_LOGIN_WRITE_BEHIND=True):
+            record_last_login(self.user)
+        buffer.flush()
+        self.assertNotEqual(self.client.get('/forms/get-users/').json()[0]['last_login'], logged_in)
+
+    def test_writes_invalidate_form_tag(self):
+        self.client.get(f'/forms/comments/{self.form.id}/')
+        self.client.get('/forms/feed/')
+        self.client.post(f'/forms/comments/{self.form.id}/', data=json.dumps({
+            'user_id': self.user.id, 'comment': 'Hola',
+        }), content_type='application/json')
+
+        comments = self.client.get(f'/forms/comments/{self.form.id}/').json()
+        self.assertEqual([comment['comment'] for comment in comments], ['Hola'])
+        feed = self.client.get('/forms/feed/').json()
+        self.assertEqual(feed[0]['comments_count'], 1)
+
+    def test_per_user_entries(self):
+        other = User.objects.create(name='Other', email='other@example.com', password='!')
+        Submission.objects.create(form=self.form, user=other, created_at=self.form.created_at)
+        self.assertFalse(self.client.get('/forms/feed/').json()[0]['answered'])
+        self.client.force_authenticate(other)
+        self.assertTrue(self.client.get('/forms/feed/').json()[0]['answered'])
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.user = User.objects.create(name='Owner', email='owner@example.com', password='!')
+        self.form = Form.objects.create(user=self.user, title='Encuesta')
+        Question.objects.create(form=self.form, type='text', question='Pregunta')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_without_queries(self):
+        for path in ['/forms/forms-info/', f'/forms/forms-info/{self.user.id}/', f'/forms/get-question/{self.form.id}/',
+                     f'/forms/comments/{self.form.id}/', f'/forms/likes/{self.form.id}/']:
+            etag = self.client.get(path)['ETag']
+            with self.assertNumQueries(0):
+                response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, path)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+    def test_last_modified_from_updated_at(self):
+        response = self.client.get(f'/forms/get-question/{self.form.id}/')
+        self.assertIn('Last-Modified', response)
+
+    def test_writes_change_etag(self):
+        path = f'/forms/comments/{self.form.id}/'
+        etag = self.client.get(path)['ETag']
+        self.client.post(path, data=json.dumps({'user_id': self.user.id, 'comment': 'Hola'}),
+                         content_type='application/json')
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pages_have_their_own_etag(self):
+        first = self.client.get('/forms/forms-info/', {'limit': 1})['ETag']
+        second = self.client.get('/forms/forms-info/', {'limit': 2})['ETag']
+        self.assertNotEqual(first, second)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        time.sleep(0.2)
+        return f'value {self.calls}'
+
+    def run_concurrently(self, count, stale_key=None):
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight('key', self.compute, 60, stale_key)))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_one_computation_per_miss(self):
+        self.assertEqual(self.run_concurrently(10), ['value 1'] * 10)
+        self.assertEqual(self.calls, 1)
+
+    def test_waiters_get_stale_value(self):
+        cache.set('stale', 'old value')
+        results = self.run_concurrently(5, stale_key='stale')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(results), ['old value'] * 4 + ['value 1'])
+        self.assertEqual(cache.get('stale'), 'value 1')
+
+    def test_other_worker_holds_lease(self):
+        cache.add('lease:key', 1)
+        cache.set('stale', 'old value')
+        self.assertEqual(single_flight('key', self.compute, 60, 'stale'), 'old value')
+        self.assertEqual(self.calls, 0)
+
+    def test_uncacheable_results_are_recomputed(self):
+        self.assertIsNone(single_flight('key', lambda: None, 60))
+        self.assertEqual(single_flight('key', self.compute, 60), 'value 1')
+
+
+class ProvisionSchemaTests(TestCase):
+    def provision(self, created, created_tables=()):
+        with mock.patch.object(provisioning, 'ensure_tables', return_value=list(created_tables)), \
+                mock.patch.object(provisioning, 'ensure_columns', return_value=created), \
+                mock.patch.object(provisioning, 'call_command') as command:
+            provisioning.provision_schema()
+        return command
+
+    def test_new_counter_columns_are_reconciled_once(self):
+        command = self.provision(['forms.likes_count', 'forms.comments_count', 'forms.responses_count'])
+        command.assert_called_once_with('reconcile_counters')
+
+    def test_new_submissions_table_is_backfilled_before_the_recount(self):
+        command = self.provision(['forms.responses_count'], created_tables=['submissions'])
+        self.assertEqual(command.call_args_list, [mock.call('backfill_submissions'), mock.call('reconcile_counters')])
+
+    def test_existing_columns_run_nothing(self):
+        self.provision([]).assert_not_called()
+
+
+class SeedQuizformTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_quizform', users=20, forms=15, questions=4, respondents=6,
+                     comments=3, likes=4, seed=3, stdout=io.StringIO(), **options)
+        return list(Answer.objects.order_by('form__title', 'question__question', 'user__email', 'answer')
+                    .values_list('form__title', 'question__question', 'user__email', 'answer'))
+
+    def test_counters_match_rows(self):
+        self.seed()
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Form.objects.count(), 15)
+        forms = Form.objects.annotate(
+            submissions=Count('submission', distinct=True),
+            comment_rows=Count('comments', distinct=True),
+            like_rows=Count('like', distinct=True),
+        )
+        for form in forms:
+            self.assertEqual(form.responses_count, form.submissions)
+            self.assertEqual(form.comments_count, form.comment_rows)
+            self.assertEqual(form.likes_count, form.like_rows)
+
+    def test_same_seed_same_data(self):
+        first = self.seed()
+        User.objects.all().delete()
+        self.assertEqual(self.seed(batch_size=7), first)
+
+
+class BenchmarkApiTests(TestCase):
+    def setUp(self):
+        call_command('seed_quizform', users=10, forms=5, questions=3, respondents=4, stdout=io.StringIO())
+        cache.clear()
+        local_cache.clear()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = os.path.join(directory, 'results.json')
+
+    def benchmark(self, **options):
+        options = {'requests': 3, 'concurrency': 1, 'warmup': 0, 'endpoints': 'feed,likes,get-question', **options}
+        call_command('benchmark_api', stdout=io.StringIO(), **options)
+
+    def test_writes_results(self):
+        self.benchmark(output=self.output)
+        with open(self.output) as output:
+            endpoints = json.load(output)['endpoints']
+        self.assertEqual(set(endpoints), {'feed', 'likes', 'get-question'})
+        self.assertEqual(endpoints['likes']['queries'], 2)
+        self.assertEqual(endpoints['likes']['errors'], 0)
+
+    def test_cold_mode_misses_the_response_cache(self):
+        for cold, expected in [(False, 0), (True, 2)]:
+            self.benchmark(output=self.output, warmup=1, cold=cold)
+            with open(self.output) as output:
+                self.assertEqual(json.load(output)['endpoints']['likes']['queries'], expected)
+
+    def test_changes_since_and_export_are_benchmarked(self):
+        self.benchmark(endpoints='changes-since,export-csv', cold=True, output=self.output)
+        with open(self.output) as output:
+            endpoints = json.load(output)['endpoints']
+        self.assertEqual(set(endpoints), {'changes-since', 'export-csv'})
+        self.assertEqual([endpoint['errors'] for endpoint in endpoints.values()], [0, 0])
+
+    def test_answers_benchmark_leaves_the_cache_alone(self):
+        versions = tag_versions([FORMS_TAG])
+        call_command('benchmark_answers', questions='1,2', repeat=2, stdout=io.StringIO())
+        local_cache.clear()
+        self.assertEqual(tag_versions([FORMS_TAG]), versions)
+
+    def test_flags_regressions(self):
+        self.benchmark(output=self.output)
+        with open(self.output) as output:
+            report = json.load(output)
+        report['endpoints']['likes']['p95_ms'] = 0.000001
+        with open(self.output, 'w') as output:
+            json.dump(report, output)
+        with self.assertRaisesMessage(CommandError, 'likes: p95'):
+            self.benchmark(baseline=self.output)
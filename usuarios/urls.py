@@ -4,11 +4,16 @@ from . import views
 urlpatterns = [
     path('get-users/', views.get_users),
     path('create-user/', views.create_user),
+    path('log-in/', views.log_in_async),
+    path('sign-up/', views.new_user_async),
     path('forms-info/', views.forms_info),
     path('forms-info/<int:user_id>/', views.user_forms),
+    path('feed/', views.feed),
+    path('changes-since/', views.changes_since),
     path('get-question/<int:form_id>/', views.question),
     path('get-answer/<int:form_id>/', views.answers),
     path('get-answers/', views.get_answer),
+    path('export/<int:form_id>/<str:export_format>/', views.export_answers),
     path('search-forms/', views.search_forms),
     path('unanswered-forms/<int:user_id>/', views.get_unanswered_forms),
     path('comments/<int:form_id>/', views.comments),
@@ -1,22 +1,42 @@
 import json
+from itertools import groupby
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse
-from .models import User, Form, Question, Answer, Comment, Like
+from django.views.decorators.http import require_POST
+from django.http import JsonResponse, StreamingHttpResponse
+from .models import User, Form, Question, Answer, Comment, Like, Submission, Tombstone
+from .loaders import user_names
+from .pagination import InvalidCursor, page_size, paginate, paginate_ranked, paginated_response
+from .changes import collect_changes, decode_positions, start_positions
+from .export import CONTENT_TYPES, STREAMS, export_stream
+from .search import search_forms_queryset
+from .authentication import issue_tokens, invalidate_cached_user
+from .last_login import record_last_login
+from .hashing import hashing_pool, HashingPoolFull
+from asgiref.sync import sync_to_async
+from .submissions import record_submissions
+from .answered import cached_answered_form_ids, warm_answered_form_ids, invalidate_answered_forms
+from .form_schema import get_form_schema
+from .cache import cached_response, form_tags, schema_tags, invalidate_form, invalidate_tags, FORMS_TAG, USERS_TAG
+from .conditional import conditional, question_validators, forms_validators, comments_validators, likes_validators
 from django.contrib.auth.hashers import make_password, check_password
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import api_view, permission_classes
-from django.contrib.postgres.search import SearchVector, TrigramSimilarity
-from django.db.models import Q
-from django.db import connection
+from django.db.models import F, Exists, OuterRef
+from django.db import transaction, IntegrityError
+
+FORM_FIELDS = ('id', 'user_id', 'title', 'description', 'status', 'created_at', 'updated_at')
 
 # Create your views here.
 @csrf_exempt
+@cached_response([USERS_TAG])
 def get_users(request):
     if request.method == "GET":
-        users = list(User.objects.all().values())
+        try:
+            users, next_cursor = paginate(User.objects.values('id', 'name', 'role', 'email', 'last_login', 'created_at'), request)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
 
         response = []
         for user in users:
@@ -28,7 +48,7 @@ def get_users(request):
                 'last_login': user['last_login']
             })
 
-        return JsonResponse(response, safe=False, status=200)
+        return paginated_response(request, response, next_cursor)
     if request.method == "POST":
         return log_in(request)
     if request.method == 'PUT':
@@ -40,34 +60,32 @@ def create_user(request):
         return new_user(request)
 
 
+@cached_response([FORMS_TAG], coalesce=True)
 def search_forms(request):
-    with connection.cursor() as cursor:
-        cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
-    
     query = request.GET.get('query', '').strip()
     if not query:
         return JsonResponse({'error': 'Query parameter is required'}, status=400)
     
-    results = Form.objects.annotate(
-        search=SearchVector('title', 'description'),
-        similarity=TrigramSimilarity('title', query) 
-    ).filter(
-        Q(search__icontains=query) |  
-        Q(similarity__gt=0.3)  
-    ).distinct().order_by('-similarity')  
+    try:
+        results, next_cursor = paginate_ranked(search_forms_queryset(query).values(
+            'id', 'title', 'description', 'status', 'created_at', 'updated_at', 'user_id',
+            name=F('user__name'),
+        ), request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
 
     response = [{
-        'id': form.id, 
-        'title': form.title,
-        'description': form.description,
-        'status': form.status,
-        'created_at': form.created_at,
-        'updated_at': form.updated_at,
-        'user_id': form.user_id,
-        'name': User.objects.get(id=form.user_id).name} 
+        'id': form['id'], 
+        'title': form['title'],
+        'description': form['description'],
+        'status': form['status'],
+        'created_at': form['created_at'],
+        'updated_at': form['updated_at'],
+        'user_id': form['user_id'],
+        'name': form['name']} 
         for form in results
     ]
-    return JsonResponse(response, safe=False)
+    return paginated_response(request, response, next_cursor)
 
 @csrf_exempt
 @api_view(['GET', 'POST', 'DELETE', 'PUT'])
@@ -84,10 +102,15 @@ def forms_info(request):
 
 @api_view(['GET', 'POST', 'DELETE', 'PUT'])
 @permission_classes([IsAuthenticated])
+@conditional(forms_validators, [FORMS_TAG])
+@cached_response([FORMS_TAG])
 def user_forms(request, user_id):
     if request.method == 'GET':
-        forms = list(Form.objects.filter(user_id=user_id).values())
-        user_name = User.objects.get(id=user_id).name
+        try:
+            forms, next_cursor = paginate(Form.objects.filter(user_id=user_id).values(*FORM_FIELDS), request)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        user_name = user_names(request).get(user_id)
         response = []
         for form in forms:
             response.append({
@@ -100,7 +123,7 @@ def user_forms(request, user_id):
                 'updated_at': form['updated_at'],
             })
 
-        return JsonResponse(response, safe=False, status=200)
+        return paginated_response(request, response, next_cursor)
 
 @csrf_exempt
 @api_view(['GET', 'POST', 'PUT'])
@@ -146,44 +169,56 @@ def likes(request, form_id):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response([FORMS_TAG])
 def get_answer(request):
     if request.method == "GET":
-        data = Answer.objects.all().values('form_id', 'user_id', 'created_at')
-
-        response_data = []
-        seen = set()
-
-        for item in data:
-            unique_key = (item['form_id'], item['user_id'])
-            
-            if unique_key in seen:
-                continue  
+        data = Submission.objects.values(
+            'id', 'form_id', 'created_at',
+            title=F('form__title'),
+            name=F('user__name'),
+        )
 
-            form_title = Form.objects.get(id=item["form_id"]).title
-            user_name = User.objects.get(id=item["user_id"]).name
+        try:
+            submissions, next_cursor = paginate(data, request)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
 
+        response_data = []
+        for item in submissions:
             response_data.append({
                 'id': item['form_id'],
-                'title': form_title, 
+                'title': item['title'], 
                 'created_at': item['created_at'],
-                'name': user_name 
+                'name': item['name']
             })
 
-            seen.add(unique_key)
-
-        return JsonResponse(response_data, safe=False)
+        return paginated_response(request, response_data, next_cursor)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cached_response([FORMS_TAG])
 def get_unanswered_forms(request, user_id):
     if request.method == "GET":
-        data = Form.objects.filter(~Q(id__in=Answer.objects.filter(user_id=user_id).values('form_id'))).values()
+        forms = Form.objects.values(*FORM_FIELDS, name=F('user__name'))
+        answered = cached_answered_form_ids(user_id)
+        if answered is None:
+            forms = forms.filter(~Exists(Submission.objects.filter(user_id=user_id, form_id=OuterRef('pk'))))
+        else:
+            forms = forms.exclude(id__in=answered)
+
+        try:
+            data, next_cursor = paginate(forms, request)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+        if answered is None:
+            warm_answered_form_ids(user_id)
 
         response = []
         for form in data:
             response.append({
                 'id': form['id'],
-                'name': User.objects.get(id=form['user_id']).name,
+                'name': form['name'],
                 'title': form['title'],
                 'description': form['description'],
                 'status': form['status'],
@@ -191,30 +226,90 @@ def get_unanswered_forms(request, user_id):
                 'updated_at': form['updated_at'],
             })
 
-        return JsonResponse(response, safe=False)
+        return paginated_response(request, response, next_cursor)
     
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@cached_response([FORMS_TAG], per_user=True)
+def feed(request):
+    if request.method == "GET":
+        data = Form.objects.annotate(
+            name=F('user__name'),
+            answered=Exists(Submission.objects.filter(form_id=OuterRef('pk'), user_id=request.user.pk)),
+        ).values(
+            'id', 'name', 'title', 'description', 'status', 'created_at', 'updated_at',
+            'likes_count', 'comments_count', 'answered',
+        )
+
+        try:
+            page, next_cursor = paginate(data, request, ordering=('-created_at', '-id'))
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+        return paginated_response(request, page, next_cursor)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def changes_since(request):
+    if request.method == "GET":
+        cursor = request.GET.get('cursor')
+        since = request.GET.get('since')
+        try:
+            if cursor:
+                positions = decode_positions(cursor)
+            elif since:
+                positions = start_positions(since)
+            else:
+                positions = {}
+            changes = collect_changes(positions, page_size(request))
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+
+        return JsonResponse(changes, safe=False)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_answers(request, form_id, export_format):
+    if request.method == "GET":
+        if export_format not in STREAMS:
+            return JsonResponse({'error': 'Unsupported export format', 'formats': list(STREAMS)}, status=400)
+        if not Form.objects.filter(id=form_id).exists():
+            return JsonResponse({'error': 'Form not found'}, status=404)
+
+        response = StreamingHttpResponse(
+            export_stream(request._request, export_format, form_id), content_type=CONTENT_TYPES[export_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="form-{form_id}-answers.{export_format}"'
+        return response
+
 # Factions Views
 # forms functions
+@conditional(forms_validators, [FORMS_TAG])
+@cached_response([FORMS_TAG])
 def get_forms(request):
-    forms = list(Form.objects.all().values())
+    try:
+        forms, next_cursor = paginate(Form.objects.values(*FORM_FIELDS), request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
 
+    names = user_names(request)
+    names.load_many(form['user_id'] for form in forms)
     response = []
     for form in forms:
-        try:
-            user = User.objects.get(id=form['user_id'])
-            response.append({
-                'id': form['id'],
-                'name': user.name,
-                'title': form['title'],
-                'description': form['description'],
-                'status': form['status'],
-                'created_at': form['created_at'],
-                'updated_at': form['updated_at'],
-            })
-        except User.DoesNotExist:
+        name = names.get(form['user_id'])
+        if name is None:
             return JsonResponse({'error': 'Usuario no encontrado'}, status=404)
+        response.append({
+            'id': form['id'],
+            'name': name,
+            'title': form['title'],
+            'description': form['description'],
+            'status': form['status'],
+            'created_at': form['created_at'],
+            'updated_at': form['updated_at'],
+        })
 
-    return JsonResponse(response, safe=False, status=200)
+    return paginated_response(request, response, next_cursor)
 
 def create_form(request):
     data = json.loads(request.body)
@@ -223,6 +318,7 @@ def create_form(request):
         title=data['title'],
         description=data['description'],
     )
+    invalidate_form(form.id)
     response = {
         'id': form.id,
         'name': User.objects.get(id=data['user_id']).name,
@@ -238,7 +334,10 @@ def create_form(request):
 def delete_form(request):
     data = json.loads(request.body)
     form = Form.objects.get(id=data['id'])
-    form.delete()
+    with transaction.atomic():
+        form.delete()
+        Tombstone.objects.create(table='forms', object_id=data['id'], form_id=data['id'], deleted_at=timezone.now())
+    invalidate_form(data['id'], schema=True)
 
     return JsonResponse('Delete Successfully', safe=False)
 
@@ -249,7 +348,8 @@ def update_form(request):
     form.description = data['description']
     form.updated_at = timezone.now()
     form.status = data['status']
-    form.save()
+    form.save(update_fields=['title', 'description', 'updated_at', 'synced_at', 'status'])
+    invalidate_form(form.id, schema=True)
 
     response = {
         'message': "Updated successfully",
@@ -267,29 +367,28 @@ def update_form(request):
     return JsonResponse( response, safe=False)
 
 # Questions functions
+@conditional(question_validators, schema_tags)
+@cached_response(schema_tags, coalesce=True)
 def get_question(request, form_id):
-    try:
-        form_name = Form.objects.get(id=form_id)
-    except Form.DoesNotExist:
+    schema = get_form_schema(form_id)
+    if schema is None:
         return JsonResponse({'error': 'Form not found'}, status=404)
 
-    data = Question.objects.filter(form_id=form_id)
-
-    if not data.exists():
+    if not schema['questions']:
         return JsonResponse({'message': 'No questions found for this form'}, status=404)
 
     response = []
-    for question in data:
+    for question in schema['questions']:
         response.append({
-            'form_title': form_name.title,
-            'question_id': question.id,
-            'form_id': question.form_id,
-            'question': question.question,
-            'type': question.type,
-            'options': question.options or [],
-            'created_at': question.created_at,
-            'updated_at': question.updated_at,
-            'description': Form.objects.get(id=form_id).description
+            'form_title': schema['title'],
+            'question_id': question['id'],
+            'form_id': schema['id'],
+            'question': question['question'],
+            'type': question['type'],
+            'options': question['options'] or [],
+            'created_at': question['created_at'],
+            'updated_at': question['updated_at'],
+            'description': schema['description']
         })
 
     return JsonResponse(response, safe=False)
@@ -298,18 +397,24 @@ def create_questions(request, form_id):
     data = json.loads(request.body)
     get_object_or_404(Form, id=form_id)
 
-    response = []
-    for question in data:
-        new_question = Question.objects.create(
-            form_id=form_id,
-            type=question['type'],
-            question=question['question'],
-            options=question.get('options', None),
-            required=question['required'],
-            created_at=timezone.now(),
-            updated_at=timezone.now(),
-        )
+    now = timezone.now()
+    with transaction.atomic():
+        new_questions = Question.objects.bulk_create([
+            Question(
+                form_id=form_id,
+                type=question['type'],
+                question=question['question'],
+                options=question.get('options', None),
+                required=question['required'],
+                created_at=now,
+                updated_at=now,
+            )
+            for question in data
+        ])
+    invalidate_form(form_id, schema=True)
 
+    response = []
+    for new_question in new_questions:
         response.append({
             'id': new_question.id,
             'type': new_question.type,
@@ -328,7 +433,20 @@ def update_question(request, form_id):
     except json.JSONDecodeError:
         return JsonResponse({"error": "Invalid JSON"}, status=400)
 
+    try:
+        for question in data:
+            if question.get('question_id'):
+                question['question_id'] = int(question['question_id'])
+    except (TypeError, ValueError):
+        return JsonResponse({'error': 'question_id must be an integer'}, status=400)
+
+    requested_ids = [question['question_id'] for question in data if question.get('question_id')]
+    existing = Question.objects.filter(form_id=form_id).in_bulk(requested_ids)
+
+    now = timezone.now()
     response = []
+    changed = []
+    created = []
     for question in data:
         required_fields = ['question', 'type']
         missing_fields = [field for field in required_fields if field not in question]
@@ -340,73 +458,122 @@ def update_question(request, form_id):
             })
             continue
 
-        if 'question_id' in question and question['question_id']:
-            try:
-                question_instance = Question.objects.get(id=question['question_id'], form_id=form_id)
-                question_instance.question = question['question']
-                question_instance.type = question['type']
-                question_instance.options = question['options']
-                question_instance.required = question.get('required', question_instance.required)
-                question_instance.updated_at = timezone.now()
-                question_instance.save()
-
-                response.append({"status": "updated", "question_id": question_instance.id})
-            except Question.DoesNotExist:
-                new_question = Question.objects.create(
-                    form_id=form_id,
-                    question=question['question'],
-                    type=question['type'],
-                    options=question.get('options', None),
-                    required=question.get('required', True),
-                    created_at=timezone.now(),
-                    updated_at=timezone.now(),
-                )
-                response.append({"status": "created", "question_id": new_question.id})
+        question_instance = existing.get(question.get('question_id'))
+        if question_instance is not None:
+            question_instance.question = question['question']
+            question_instance.type = question['type']
+            question_instance.options = question['options']
+            question_instance.required = question.get('required', question_instance.required)
+            question_instance.updated_at = now
+            changed.append(question_instance)
+
+            response.append({"status": "updated", "question_id": question_instance.id})
         else:
-            new_question = Question.objects.create(
+            new_question = Question(
                 form_id=form_id,
                 question=question['question'],
                 type=question['type'],
                 options=question.get('options', None),
                 required=question.get('required', True),
-                created_at=timezone.now(),
-                updated_at=timezone.now(),
+                created_at=now,
+                updated_at=now,
             )
-            response.append({"status": "created", "question_id": new_question.id})
+            entry = {"status": "created", "question_id": None}
+            created.append((entry, new_question))
+            response.append(entry)
+
+    with transaction.atomic():
+        Question.objects.bulk_update(changed, ['question', 'type', 'options', 'required', 'updated_at'])
+        Question.objects.bulk_create([new_question for _, new_question in created])
+    invalidate_form(form_id, schema=True)
+
+    for entry, new_question in created:
+        entry['question_id'] = new_question.id
 
     return JsonResponse(response, safe=False)
 
 # ANSWER FUNCTION
+@cached_response(form_tags, coalesce=True)
 def get_answers(request, form_id):
-    data = Answer.objects.filter(form_id=form_id)
-    user_name = data[0].user.name
+    form_title = Form.objects.filter(id=form_id).values_list('title', flat=True).first()
+    data = (
+        Answer.objects.filter(form_id=form_id)
+        .select_related('question', 'user')
+        .order_by('user_id', 'created_at', 'id')
+    )
+    grouped = request.GET.get('group') == 'respondent'
+
     response = []
-    for answer in data:
-        question = Question.objects.get(id=answer.question_id).question
-        form_title = Form.objects.get(id=answer.form_id).title
-        response.append({
-            'id': answer.id,
-            'question_id': question,
-            'form_id': form_title,
-            'user_name': user_name,
-            'answer': answer.answer,
-            'created_at': answer.created_at,
-            })
-        
+    for user_id, answers in groupby(data.iterator(chunk_size=2000), key=lambda answer: answer.user_id):
+        submission = None
+        for answer in answers:
+            user_name = answer.user.name if answer.user else None
+            row = {
+                'id': answer.id,
+                'question_id': answer.question.question,
+                'form_id': form_title,
+                'user_name': user_name,
+                'answer': answer.answer,
+                'created_at': answer.created_at,
+            }
+            if not grouped:
+                response.append(row)
+                continue
+            if submission is None:
+                submission = {
+                    'user_id': user_id,
+                    'user_name': user_name,
+                    'created_at': answer.created_at,
+                    'answers': [],
+                }
+                response.append(submission)
+            submission['answers'].append(row)
+
     return JsonResponse(response, safe=False)
 
 def create_answers(request, form_id):
     data = json.loads(request.body)
 
+    try:
+        for answer in data:
+            answer['question_id'] = int(answer['question_id'])
+            answer['user_id'] = None if answer['user_id'] is None else int(answer['user_id'])
+    except (KeyError, TypeError, ValueError):
+        return JsonResponse({'error': 'question_id and user_id must be integers'}, status=400)
+
+    question_ids = {answer['question_id'] for answer in data}
+    valid_ids = set(Question.objects.filter(form_id=form_id, id__in=question_ids).values_list('id', flat=True))
+    invalid_ids = question_ids - valid_ids
+    if invalid_ids:
+        return JsonResponse({
+            'error': 'Questions do not belong to this form',
+            'question_ids': list(invalid_ids),
+        }, status=400)
+
+    now = timezone.now()
+    with transaction.atomic():
+        new_answers = Answer.objects.bulk_create([
+            Answer(
+                form_id=form_id,
+                question_id=answer['question_id'],
+                user_id=answer['user_id'],
+                answer=answer['answer'],
+                created_at=now,
+            )
+            for answer in data
+        ])
+
+        answered_by = {answer['user_id'] for answer in data if answer['user_id'] is not None}
+        new_respondents = record_submissions(form_id, sorted(answered_by), now)
+        if new_respondents:
+            Form.objects.filter(id=form_id).update(
+                responses_count=F('responses_count') + new_respondents, synced_at=now,
+            )
+    invalidate_answered_forms(answered_by)
+    invalidate_form(form_id)
+
     response = []
-    for answer in data:
-        new_answer = Answer.objects.create(
-            form_id=form_id,
-            question_id=answer['question_id'],
-            user_id=answer['user_id'],
-            answer=answer['answer'],
-            created_at=timezone.now(),
-        )
+    for new_answer in new_answers:
         response.append({
             'id': new_answer.id,
             'form_id': new_answer.form_id,
@@ -431,10 +598,12 @@ def new_user(request):
         password=make_password(data['password']),
         created_at=timezone.now(),
     )
+    invalidate_tags(USERS_TAG)
+
+    return new_user_response(user)
 
-    refresh = RefreshToken.for_user(user)
-    access_token = str(refresh.access_token)
-    refresh_token = str(refresh)
+def new_user_response(user):
+    access_token, refresh_token = issue_tokens(user)
 
     response = {
         'id': user.id,
@@ -459,27 +628,78 @@ def log_in(request):
 
         try:
             user = User.objects.get(email=email)
-            user.last_login = timezone.now()
-            user.save()
         except User.DoesNotExist:
             return JsonResponse({'error': 'Credenciales inválidas'}, status=401)
         
         if check_password(password, user.password):
-            # Generar los tokens JWT
-            refresh = RefreshToken.for_user(user)
-            access_token = str(refresh.access_token)
-            refresh_token = str(refresh)
-
-            response_data = {
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'role': user.role,
-                'access': access_token,
-                'refresh': refresh_token,
-            }
-            
-            return JsonResponse(response_data, status=200, safe=False)
+            record_last_login(user)
+            return log_in_response(user)
+        else:
+            return JsonResponse({'error': 'Credenciales inválidas'}, status=401)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+def log_in_response(user):
+    # Generar los tokens JWT
+    access_token, refresh_token = issue_tokens(user)
+
+    response_data = {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'role': user.role,
+        'access': access_token,
+        'refresh': refresh_token,
+    }
+    
+    return JsonResponse(response_data, status=200, safe=False)
+
+# Async versions for ASGI: password hashing runs on the bounded hashing pool
+# so a login burst does not block the event loop or the other endpoints.
+@csrf_exempt
+@require_POST
+async def new_user_async(request):
+    data = json.loads(request.body)
+
+    if await User.objects.filter(email=data['email']).aexists():
+        return JsonResponse({"error": "El email ya existe"}, status=400)
+
+    try:
+        password = await hashing_pool.make_password(data['password'])
+    except HashingPoolFull:
+        return JsonResponse({'error': 'Servidor ocupado, intenta de nuevo'}, status=503)
+
+    user = await User.objects.acreate(
+        name=data['name'],
+        email=data['email'],
+        password=password,
+        created_at=timezone.now(),
+    )
+    await sync_to_async(invalidate_tags)(USERS_TAG)
+
+    return new_user_response(user)
+
+@csrf_exempt
+@require_POST
+async def log_in_async(request):
+    try:
+        item = json.loads(request.body)
+        if 'email' not in item or 'password' not in item:
+            return JsonResponse({'error': 'Faltan datos'}, status=400)
+
+        try:
+            user = await User.objects.aget(email=item['email'])
+        except User.DoesNotExist:
+            return JsonResponse({'error': 'Credenciales inválidas'}, status=401)
+
+        try:
+            valid = await hashing_pool.check_password(item['password'], user.password)
+        except HashingPoolFull:
+            return JsonResponse({'error': 'Servidor ocupado, intenta de nuevo'}, status=503)
+
+        if valid:
+            await sync_to_async(record_last_login)(user)
+            return log_in_response(user)
         else:
             return JsonResponse({'error': 'Credenciales inválidas'}, status=401)
     except Exception as e:
@@ -490,7 +710,9 @@ def update_user(request):
     user = get_object_or_404(User, id=data['id'])
 
     user.role = data['role']
-    user.save()
+    user.save(update_fields=['role', 'updated_at'])
+    invalidate_cached_user(user.id)
+    invalidate_tags(USERS_TAG)
 
     return JsonResponse('Update Success', safe=False)
 
@@ -499,13 +721,16 @@ def new_comment(request, form_id):
     data = json.loads(request.body)
     form = get_object_or_404(Form, id=form_id)
 
-    comment = Comment.objects.create(
-        form_id=form_id,
-        user_id=data['user_id'],
-        comment=data['comment'],
-        created_at=timezone.now(),
-        updated_at=timezone.now(),
-    )
+    with transaction.atomic():
+        comment = Comment.objects.create(
+            form_id=form_id,
+            user_id=data['user_id'],
+            comment=data['comment'],
+            created_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+        Form.objects.filter(id=form_id).update(comments_count=F('comments_count') + 1, synced_at=comment.created_at)
+    invalidate_form(form_id)
 
     response = {
         'id': comment.id,
@@ -519,40 +744,62 @@ def new_comment(request, form_id):
 
     return JsonResponse(response, safe=False, status=201)
 
+@conditional(comments_validators, form_tags)
+@cached_response(form_tags)
 def get_comments(request, form_id):
-    comments = Comment.objects.filter(form_id=form_id).values()
+    try:
+        comments, next_cursor = paginate(Comment.objects.filter(form_id=form_id).values(), request)
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
 
+    names = user_names(request)
+    names.load_many(item['user_id'] for item in comments)
     response = []
     for item in comments:
         response.append({
             'id': item['id'],
             'form_id': item['form_id'],
-            'name': User.objects.get(id=item['user_id']).name,
+            'name': names.get(item['user_id']),
             'created_at': item['created_at'],
             'updated_at': item['updated_at'],
             'comment': item['comment']
         })
 
-    return JsonResponse(response, safe=False)
+    return paginated_response(request, response, next_cursor)
 
 def delete_comment(request, comment_id):
     comment = get_object_or_404(Comment, id=comment_id)
-    comment.delete()
+    with transaction.atomic():
+        comment.delete()
+        Form.objects.filter(id=comment.form_id).update(comments_count=F('comments_count') - 1, synced_at=timezone.now())
+        Tombstone.objects.create(table='comments', object_id=comment_id, form_id=comment.form_id, deleted_at=timezone.now())
+    invalidate_form(comment.form_id)
 
     return JsonResponse("Deleted successfully", safe=False)
 
 # Likes functions
 def give_like(request, form_id):
     user = request.user
-    form = Form.objects.get(id=form_id)
 
-    if Like.objects.filter(user=user, form=form).exists():
+    try:
+        with transaction.atomic():
+            # likes is unmanaged, so its unique index may be missing. Locking
+            # the form row, which the counter update locks anyway, keeps two
+            # likes from the same user from both passing the check.
+            form = Form.objects.select_for_update().get(id=form_id)
+            if Like.objects.filter(user=user, form=form).exists():
+                return JsonResponse({"message": "You already liked this form."}, status=400)
+            Like.objects.create(user=user, form=form)
+            Form.objects.filter(id=form_id).update(likes_count=F('likes_count') + 1, synced_at=timezone.now())
+    except IntegrityError:
         return JsonResponse({"message": "You already liked this form."}, status=400)
-    
-    Like.objects.create(user=user, form=form)
-    new_count = Like.objects.filter(form_id=form_id).count()
-    return JsonResponse({"message": "Like added successfully", "likes_count": new_count}, status=201)
+    invalidate_form(form_id)
+
+    form.refresh_from_db(fields=['likes_count'])
+    return JsonResponse({"message": "Like added successfully", "likes_count": form.likes_count}, status=201)
 
+@conditional(likes_validators, form_tags)
+@cached_response(form_tags)
 def get_likes(request, form_id):
-    likes_count = Like.objects.filter(form_id=form_id).count()
+    likes_count = Form.objects.filter(id=form_id).values_list('likes_count', flat=True).first() or 0
     return JsonResponse({"likes_count": likes_count})
\ No newline at end of file